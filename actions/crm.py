@@ -2,22 +2,104 @@
 
 import os
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from dataclasses import dataclass
+from functools import cache
+from typing import Dict, Any, Optional, List, Tuple
 import httpx
+import orjson
+
+from actions.http_utils import IDEMPOTENT_METHODS, AdaptiveConcurrencyLimiter, retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
+# Maximum emails per SOQL IN clause, keeps the query well under URL/SOQL length limits
+SOQL_IN_BATCH_SIZE = 200
+
+# Single-contact lookup; callers only ever use the first match
+_CONTACT_BY_EMAIL_QUERY = (
+    "SELECT Id, FirstName, LastName, Email, AccountId FROM Contact "
+    "WHERE Email = {email} LIMIT 1"
+)
+
+
+def _soql_quote(value: str) -> str:
+    """Quote a string literal for use in a SOQL query."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+@dataclass(frozen=True)
+class SalesforceConfig:
+    """Salesforce instance, credentials and precomputed request headers."""
+    instance_url: Optional[str]
+    access_token: Optional[str]
+    headers: Dict[str, str]
+
+
+@cache
+def _load_config() -> SalesforceConfig:
+    """Read Salesforce settings from the environment once per process."""
+    access_token = os.getenv("SALESFORCE_ACCESS_TOKEN")
+    return SalesforceConfig(
+        instance_url=os.getenv("SALESFORCE_INSTANCE_URL"),
+        access_token=access_token,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        } if access_token else {}
+    )
+
 
 class SalesforceClient:
     """Salesforce API client for CRM operations."""
     
     def __init__(self):
-        self.instance_url = os.getenv("SALESFORCE_INSTANCE_URL")
-        self.access_token = os.getenv("SALESFORCE_ACCESS_TOKEN")
-        self.headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        } if self.access_token else {}
+        config = _load_config()
+        self.instance_url = config.instance_url
+        self.access_token = config.access_token
+        self.headers = config.headers
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limiter = AdaptiveConcurrencyLimiter(max_limit=8)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and reused across calls."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.instance_url or "",
+                headers=self.headers,
+                # Salesforce caps concurrent sessions per user; keep the pool small
+                limits=httpx.Limits(
+                    max_connections=4, max_keepalive_connections=2, keepalive_expiry=60
+                ),
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                http2=True
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "SalesforceClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared client under the concurrency limiter.
+
+        Transient failures (429, 502-504, timeouts) are retried with
+        exponential backoff; non-idempotent requests are only retried when
+        they cannot have been applied.
+        """
+        return await retry_with_backoff(
+            lambda: self._limiter.run(lambda: self.client.request(method, url, **kwargs)),
+            idempotent=method.upper() in IDEMPOTENT_METHODS
+        )
     
     async def create_lead(
         self, 
@@ -57,22 +139,20 @@ class SalesforceClient:
                 "Status": "Open - Not Contacted"
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.instance_url}/services/data/v58.0/sobjects/Lead",
-                    headers=self.headers,
-                    json=lead_data
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                return {
-                    "id": result["id"],
-                    "success": result["success"],
-                    "url": f"{self.instance_url}/{result['id']}"
-                }
+            response = await self._request(
+                "POST", "/services/data/v58.0/sobjects/Lead",
+                content=orjson.dumps(lead_data)
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            
+            return {
+                "id": result["id"],
+                "success": result["success"],
+                "url": f"{self.instance_url}/{result['id']}"
+            }
         except Exception as e:
-            logger.error(f"Failed to create lead: {e}")
+            logger.error("Failed to create lead: %s", e)
             raise
     
     async def create_opportunity(
@@ -113,22 +193,20 @@ class SalesforceClient:
             if amount:
                 opp_data["Amount"] = amount
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.instance_url}/services/data/v58.0/sobjects/Opportunity",
-                    headers=self.headers,
-                    json=opp_data
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                return {
-                    "id": result["id"],
-                    "success": result["success"],
-                    "url": f"{self.instance_url}/{result['id']}"
-                }
+            response = await self._request(
+                "POST", "/services/data/v58.0/sobjects/Opportunity",
+                content=orjson.dumps(opp_data)
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            
+            return {
+                "id": result["id"],
+                "success": result["success"],
+                "url": f"{self.instance_url}/{result['id']}"
+            }
         except Exception as e:
-            logger.error(f"Failed to create opportunity: {e}")
+            logger.error("Failed to create opportunity: %s", e)
             raise
     
     async def search_contacts(self, email: str) -> List[Dict[str, Any]]:
@@ -153,26 +231,87 @@ class SalesforceClient:
             ]
         
         try:
-            query = f"SELECT Id, FirstName, LastName, Email, AccountId FROM Contact WHERE Email = '{email}'"
+            query = _CONTACT_BY_EMAIL_QUERY.format(email=_soql_quote(email))
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.instance_url}/services/data/v58.0/query",
-                    headers=self.headers,
+            response = await self._request(
+                "GET", "/services/data/v58.0/query",
+                params={"q": query}
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            
+            return result.get("records", [])
+        except Exception as e:
+            # Re-raise so a failed search isn't mistaken for "no such contact"
+            logger.error("Failed to search contacts: %s", e)
+            raise
+    
+    async def search_contacts_bulk(self, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Search for contacts matching any of the given emails.
+        
+        Issues one SOQL ``IN`` query per batch of ``SOQL_IN_BATCH_SIZE``
+        emails instead of one query per email.
+        
+        Args:
+            emails: Emails to search for
+            
+        Returns:
+            Mapping of requested email to its matching contact; emails
+            without a match are omitted
+        """
+        unique_emails = list(dict.fromkeys(emails))
+        
+        if not self.access_token:
+            logger.warning("SALESFORCE_ACCESS_TOKEN not set, returning mock response")
+            return {
+                email: {
+                    "Id": "0031234567890ABCDE",
+                    "FirstName": "John",
+                    "LastName": "Doe",
+                    "Email": email,
+                    "AccountId": "0011234567890ABCDE"
+                }
+                for email in unique_emails
+            }
+        
+        try:
+            # Salesforce matches emails case-insensitively
+            found: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(unique_emails), SOQL_IN_BATCH_SIZE):
+                batch = unique_emails[start:start + SOQL_IN_BATCH_SIZE]
+                query = (
+                    "SELECT Id, FirstName, LastName, Email, AccountId FROM Contact "
+                    f"WHERE Email IN ({', '.join(_soql_quote(email) for email in batch)})"
+                )
+                
+                response = await self._request(
+                    "GET", "/services/data/v58.0/query",
                     params={"q": query}
                 )
                 response.raise_for_status()
-                result = response.json()
+                result = orjson.loads(response.content)
                 
-                return result.get("records", [])
+                for record in result.get("records", []):
+                    found.setdefault((record.get("Email") or "").lower(), record)
+            
+            return {
+                email: found[email.lower()]
+                for email in unique_emails
+                if email.lower() in found
+            }
         except Exception as e:
-            logger.error(f"Failed to search contacts: {e}")
-            return []
+            logger.error("Failed to bulk search contacts: %s", e)
+            return {}
 
 
 # Default client instance
 crm_client = SalesforceClient()
 
+# Short-lived cache of contact lookups: lowercased email -> (expires_at, contact or None)
+CONTACT_CACHE_TTL = 60.0
+CONTACT_CACHE_MAXSIZE = 4096
+_contact_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
 
 async def create_lead_from_inquiry(
     name: str, 
@@ -192,9 +331,7 @@ async def create_lead_from_inquiry(
         Lead ID
     """
     # Split name into first/last
-    name_parts = name.split(" ", 1)
-    first_name = name_parts[0]
-    last_name = name_parts[1] if len(name_parts) > 1 else ""
+    first_name, _, last_name = name.partition(" ")
     
     lead_data = await crm_client.create_lead(
         first_name=first_name,
@@ -204,17 +341,49 @@ async def create_lead_from_inquiry(
         source="Website Inquiry"
     )
     
+    # The CRM state for this email changed, drop any cached lookup
+    _contact_cache.pop(email.lower(), None)
+    
     return lead_data["id"]
 
 
 async def find_existing_contact(email: str) -> Optional[Dict[str, Any]]:
     """Find existing contact by email.
     
+    Results (including misses) are cached for ``CONTACT_CACHE_TTL`` seconds
+    so repeated checks within an agent run skip the Salesforce round-trip.
+    Failed searches raise and are not cached. Emails are matched
+    case-insensitively, as Salesforce does.
+    
     Args:
         email: Contact email
         
     Returns:
         Contact data if found, None otherwise
     """
+    key = email.lower()
+    now = time.monotonic()
+    cached = _contact_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    
     contacts = await crm_client.search_contacts(email)
-    return contacts[0] if contacts else None
\ No newline at end of file
+    contact = contacts[0] if contacts else None
+    
+    if len(_contact_cache) >= CONTACT_CACHE_MAXSIZE:
+        # Evict the oldest entry (dicts preserve insertion order)
+        _contact_cache.pop(next(iter(_contact_cache)), None)
+    _contact_cache[key] = (now + CONTACT_CACHE_TTL, contact)
+    return contact
+
+
+async def find_existing_contacts(emails: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Find existing contacts for a batch of emails in as few queries as possible.
+    
+    Args:
+        emails: Contact emails
+        
+    Returns:
+        Mapping of email to contact data for the emails that were found
+    """
+    return await crm_client.search_contacts_bulk(emails)
\ No newline at end of file
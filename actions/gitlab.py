@@ -18,6 +18,32 @@ class GitLabClient:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         } if self.token else {}
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and reused across calls."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                http2=True
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "GitLabClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
     
     async def create_merge_request(
         self, 
@@ -49,21 +75,19 @@ class GitLabClient:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/projects/{project_id}/merge_requests",
-                    headers=self.headers,
-                    json={
-                        "source_branch": source_branch,
-                        "target_branch": target_branch,
-                        "title": title,
-                        "description": description
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.client.post(
+                f"/projects/{project_id}/merge_requests",
+                json={
+                    "source_branch": source_branch,
+                    "target_branch": target_branch,
+                    "title": title,
+                    "description": description
+                }
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
-            logger.error(f"Failed to create MR: {e}")
+            logger.error("Failed to create MR: %s", e)
             raise
     
     async def create_branch(self, project_id: str, branch_name: str, ref: str = "main") -> Dict[str, Any]:
@@ -85,19 +109,17 @@ class GitLabClient:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/projects/{project_id}/repository/branches",
-                    headers=self.headers,
-                    json={
-                        "branch": branch_name,
-                        "ref": ref
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.client.post(
+                f"/projects/{project_id}/repository/branches",
+                json={
+                    "branch": branch_name,
+                    "ref": ref
+                }
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
-            logger.error(f"Failed to create branch: {e}")
+            logger.error("Failed to create branch: %s", e)
             raise
     
     async def commit_files(
@@ -127,20 +149,18 @@ class GitLabClient:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/projects/{project_id}/repository/commits",
-                    headers=self.headers,
-                    json={
-                        "branch": branch_name,
-                        "commit_message": commit_message,
-                        "actions": files
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.client.post(
+                f"/projects/{project_id}/repository/commits",
+                json={
+                    "branch": branch_name,
+                    "commit_message": commit_message,
+                    "actions": files
+                }
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
-            logger.error(f"Failed to commit files: {e}")
+            logger.error("Failed to commit files: %s", e)
             raise
 
 
@@ -0,0 +1,198 @@
+"""Shared HTTP helpers for the external API clients."""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable
+import httpx
+
+from llm.retry import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient gateway failures
+RETRIABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Methods that can be resent even if the first attempt reached the provider
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Failures after which the provider cannot have applied the request, so
+# non-idempotent requests may be retried without creating duplicates
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_NOT_APPLIED_STATUS_CODES = frozenset({429, 503})
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limiter bounding in-flight requests to a single provider.
+
+    The concurrency limit starts at ``max_limit``, is halved whenever the
+    provider throttles (429), fails (5xx) or drops the connection, and
+    grows back additively on each successful response.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        increase: float = 0.5,
+        decrease_factor: float = 0.5
+    ):
+        """Initialize the limiter.
+
+        Args:
+            max_limit: Upper bound on concurrent requests
+            min_limit: Lower bound the limit never drops below
+            increase: Amount added to the limit after each success
+            decrease_factor: Multiplier applied to the limit on throttling
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(self.min_limit, int(self._limit))
+
+    async def run(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Wait for a free slot, send the request and adjust the limit.
+
+        Args:
+            send: Zero-argument callable issuing the HTTP request
+
+        Returns:
+            The provider response
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+        throttled = None
+        try:
+            response = await send()
+            throttled = response.status_code == 429 or response.status_code >= 500
+            return response
+        except httpx.TransportError:
+            throttled = True
+            raise
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                if throttled is not None:
+                    self._adjust(throttled)
+                self._condition.notify_all()
+
+    def _adjust(self, throttled: bool) -> None:
+        """Apply the AIMD update for one completed request."""
+        if throttled:
+            self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+            logger.debug("Provider throttling, concurrency limit reduced to %s", self.limit)
+        else:
+            self._limit = min(float(self.max_limit), self._limit + self.increase)
+
+
+class RateLimitGate:
+    """Pause outbound requests when a provider reports its quota is nearly spent.
+
+    Reads ``x-rate-limit-remaining``/``x-rate-limit-limit``/``x-rate-limit-reset``
+    (Twitter/X) and ``Retry-After`` (Slack, and any 429) from each response.
+    """
+
+    def __init__(self, threshold: float = 0.1):
+        """Initialize the gate.
+
+        Args:
+            threshold: Fraction of remaining quota below which requests pause
+        """
+        self.threshold = threshold
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        """Sleep until the provider's rate-limit window allows another request."""
+        delay = self._resume_at - time.time()
+        if delay > 0:
+            logger.info("Rate limit nearly exhausted, pausing requests for %.1fs", delay)
+            await asyncio.sleep(delay)
+
+    def update(self, response: httpx.Response) -> None:
+        """Record the rate-limit state reported by a response."""
+        headers = response.headers
+
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after is not None:
+            self._resume_at = max(self._resume_at, time.time() + retry_after)
+            return
+
+        remaining = headers.get("x-rate-limit-remaining")
+        limit = headers.get("x-rate-limit-limit")
+        reset = headers.get("x-rate-limit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining_count = int(remaining)
+            limit_count = int(limit) if limit else 0
+            reset_at = float(reset)
+        except ValueError:
+            return
+
+        if remaining_count <= 0 or (limit_count and remaining_count / limit_count < self.threshold):
+            self._resume_at = max(self._resume_at, reset_at)
+
+
+async def retry_with_backoff(
+    send: Callable[[], Awaitable[httpx.Response]],
+    max_attempts: int = 3,
+    base: float = 0.5,
+    cap: float = 8.0,
+    idempotent: bool = True
+) -> httpx.Response:
+    """Send a request, retrying transient failures with exponential backoff.
+
+    Timeouts, connection errors and responses in ``RETRIABLE_STATUS_CODES``
+    are retried; the delay doubles per attempt (capped at ``cap``, plus a
+    little jitter) unless the response carries a Retry-After header. Any
+    other status is returned immediately for the caller to handle.
+
+    Requests that are not idempotent are only retried when the provider
+    cannot have applied them: connection failures before the request was
+    sent, and 429/503 responses.
+
+    Args:
+        send: Zero-argument callable issuing the HTTP request
+        max_attempts: Total number of attempts
+        base: Delay before the first retry in seconds
+        cap: Maximum backoff delay in seconds
+        idempotent: Whether repeating the request is harmless
+
+    Returns:
+        The first non-retriable response, or the last response received
+    """
+    if idempotent:
+        retriable_errors = (httpx.TimeoutException, httpx.NetworkError)
+        retriable_statuses = RETRIABLE_STATUS_CODES
+    else:
+        retriable_errors = _NOT_SENT_ERRORS
+        retriable_statuses = _NOT_APPLIED_STATUS_CODES
+
+    for attempt in range(max_attempts):
+        is_last = attempt == max_attempts - 1
+        backoff = min(cap, base * 2 ** attempt) + random.random() * 0.1
+        try:
+            response = await send()
+        except retriable_errors as e:
+            if is_last:
+                raise
+            delay = backoff
+            logger.warning("Request failed (%r), retrying in %.2fs", e, delay)
+        else:
+            if response.status_code not in retriable_statuses or is_last:
+                return response
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            delay = retry_after if retry_after is not None else backoff
+            logger.warning("Received HTTP %s, retrying in %.2fs", response.status_code, delay)
+        await asyncio.sleep(delay)
@@ -1,23 +1,99 @@
 """Slack API integration for team communication."""
 
+import asyncio
 import os
 import logging
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass
+from functools import cache
+from typing import Dict, Any, Optional, List, Set
 import httpx
+import orjson
+
+from actions.http_utils import (
+    IDEMPOTENT_METHODS,
+    AdaptiveConcurrencyLimiter,
+    RateLimitGate,
+    retry_with_backoff
+)
 
 logger = logging.getLogger(__name__)
 
+# Emoji prefixes for notification colors
+_COLOR_EMOJI = {"good": "✅", "warning": "⚠️", "danger": "🚨"}
+_DEFAULT_NOTIFICATION_EMOJI = "🔔"
+
+
+@dataclass(frozen=True)
+class SlackConfig:
+    """Slack bot token and precomputed request headers."""
+    token: Optional[str]
+    headers: Dict[str, str]
+
+
+@cache
+def _load_config() -> SlackConfig:
+    """Read Slack settings from the environment once per process."""
+    token = os.getenv("SLACK_BOT_TOKEN")
+    return SlackConfig(
+        token=token,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        } if token else {}
+    )
+
 
 class SlackClient:
     """Slack API client for team communication."""
     
     def __init__(self):
-        self.token = os.getenv("SLACK_BOT_TOKEN")
+        config = _load_config()
+        self.token = config.token
         self.base_url = "https://slack.com/api"
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        } if self.token else {}
+        self.headers = config.headers
+        self._client: Optional[httpx.AsyncClient] = None
+        self._rate_limit = RateLimitGate()
+        self._limiter = AdaptiveConcurrencyLimiter(max_limit=16)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and reused across calls."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                http2=True
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "SlackClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared client, honoring provider rate limits.
+
+        Waits out any exhausted rate-limit window before sending and retries
+        transient failures (429, 502-504, timeouts) with exponential backoff;
+        non-idempotent requests are only retried when they cannot have been applied.
+        """
+        async def send() -> httpx.Response:
+            await self._rate_limit.wait()
+            response = await self._limiter.run(lambda: self.client.request(method, url, **kwargs))
+            self._rate_limit.update(response)
+            return response
+        
+        return await retry_with_backoff(send, idempotent=method.upper() in IDEMPOTENT_METHODS)
     
     async def send_message(
         self, 
@@ -52,16 +128,14 @@ class SlackClient:
             if blocks:
                 message_data["blocks"] = blocks
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat.postMessage",
-                    headers=self.headers,
-                    json=message_data
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._request(
+                "POST", "/chat.postMessage",
+                content=orjson.dumps(message_data)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except Exception as e:
-            logger.error(f"Failed to send Slack message: {e}")
+            logger.error("Failed to send Slack message: %s", e)
             raise
     
     async def update_message(
@@ -95,16 +169,14 @@ class SlackClient:
             if blocks:
                 message_data["blocks"] = blocks
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat.update",
-                    headers=self.headers,
-                    json=message_data
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._request(
+                "POST", "/chat.update",
+                content=orjson.dumps(message_data)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except Exception as e:
-            logger.error(f"Failed to update Slack message: {e}")
+            logger.error("Failed to update Slack message: %s", e)
             raise
     
     async def get_channels(self) -> List[Dict[str, Any]]:
@@ -121,17 +193,15 @@ class SlackClient:
             ]
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/conversations.list",
-                    headers=self.headers,
-                    params={"types": "public_channel,private_channel"}
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("channels", [])
+            response = await self._request(
+                "GET", "/conversations.list",
+                params={"types": "public_channel,private_channel"}
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            return result.get("channels", [])
         except Exception as e:
-            logger.error(f"Failed to get Slack channels: {e}")
+            logger.error("Failed to get Slack channels: %s", e)
             return []
 
 
@@ -180,12 +250,53 @@ async def send_notification(
         }
     ]
     
-    # Add color bar using attachment fallback
-    text_with_status = f"🔔 *{title}*\n{message}"
+    # Prefix the plain-text fallback with an emoji matching the color
+    emoji = _COLOR_EMOJI.get(color, _DEFAULT_NOTIFICATION_EMOJI)
+    text_with_status = f"{emoji} *{title}*\n{message}"
     
     response = await slack_client.send_message(
         channel=channel,
         text=text_with_status,
         blocks=blocks
     )
-    return response.get("ts", "")
\ No newline at end of file
+    return response.get("ts", "")
+
+
+# Strong references to in-flight background notifications so they aren't
+# garbage collected before completing
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _on_notification_done(task: asyncio.Task) -> None:
+    """Release a finished background notification and log any failure."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background Slack notification failed: %s", task.exception())
+
+
+def send_notification_nowait(
+    channel: str,
+    title: str,
+    message: str,
+    color: str = "good"
+) -> None:
+    """Send a formatted notification in the background without waiting for it.
+    
+    Failures are logged; call flush_notifications() before shutdown so
+    pending notifications are delivered.
+    
+    Args:
+        channel: Channel name
+        title: Notification title
+        message: Notification message
+        color: Notification color (good, warning, danger)
+    """
+    task = asyncio.create_task(send_notification(channel, title, message, color))
+    _background_tasks.add(task)
+    task.add_done_callback(_on_notification_done)
+
+
+async def flush_notifications() -> None:
+    """Wait for all pending background notifications, e.g. at shutdown."""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
\ No newline at end of file
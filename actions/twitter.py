@@ -2,27 +2,113 @@
 
 import os
 import logging
+from dataclasses import dataclass
+from functools import cache
 from typing import Dict, Any, Optional, List
 import httpx
+import orjson
+
+from actions.http_utils import (
+    IDEMPOTENT_METHODS,
+    AdaptiveConcurrencyLimiter,
+    RateLimitGate,
+    retry_with_backoff
+)
 
 logger = logging.getLogger(__name__)
 
+# Recent search page size bounds, and a cap on results gathered across pages
+SEARCH_PAGE_MIN = 10
+SEARCH_PAGE_MAX = 100
+SEARCH_MAX_RESULTS = 1000
+
+
+@dataclass(frozen=True)
+class TwitterConfig:
+    """Twitter/X credentials and precomputed request headers."""
+    api_key: Optional[str]
+    api_secret: Optional[str]
+    access_token: Optional[str]
+    access_token_secret: Optional[str]
+    bearer_token: Optional[str]
+    headers: Dict[str, str]
+
+
+@cache
+def _load_config() -> TwitterConfig:
+    """Read Twitter/X settings from the environment once per process."""
+    bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
+    return TwitterConfig(
+        api_key=os.getenv("TWITTER_API_KEY"),
+        api_secret=os.getenv("TWITTER_API_SECRET"),
+        access_token=os.getenv("TWITTER_ACCESS_TOKEN"),
+        access_token_secret=os.getenv("TWITTER_ACCESS_TOKEN_SECRET"),
+        bearer_token=bearer_token,
+        headers={
+            "Authorization": f"Bearer {bearer_token}",
+            "Content-Type": "application/json"
+        } if bearer_token else {}
+    )
+
 
 class TwitterClient:
     """Twitter/X API client for social media operations."""
     
     def __init__(self):
-        self.api_key = os.getenv("TWITTER_API_KEY")
-        self.api_secret = os.getenv("TWITTER_API_SECRET")
-        self.access_token = os.getenv("TWITTER_ACCESS_TOKEN")
-        self.access_token_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
-        self.bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
+        config = _load_config()
+        self.api_key = config.api_key
+        self.api_secret = config.api_secret
+        self.access_token = config.access_token
+        self.access_token_secret = config.access_token_secret
+        self.bearer_token = config.bearer_token
         
         self.base_url = "https://api.twitter.com/2"
-        self.headers = {
-            "Authorization": f"Bearer {self.bearer_token}",
-            "Content-Type": "application/json"
-        } if self.bearer_token else {}
+        self.headers = config.headers
+        self._client: Optional[httpx.AsyncClient] = None
+        self._rate_limit = RateLimitGate()
+        self._limiter = AdaptiveConcurrencyLimiter(max_limit=4)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and reused across calls."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=16, max_keepalive_connections=8, keepalive_expiry=30
+                ),
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                http2=True
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "TwitterClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared client, honoring provider rate limits.
+
+        Waits out any exhausted rate-limit window before sending and retries
+        transient failures (429, 502-504, timeouts) with exponential backoff;
+        non-idempotent requests are only retried when they cannot have been applied.
+        """
+        async def send() -> httpx.Response:
+            await self._rate_limit.wait()
+            response = await self._limiter.run(lambda: self.client.request(method, url, **kwargs))
+            self._rate_limit.update(response)
+            return response
+        
+        return await retry_with_backoff(send, idempotent=method.upper() in IDEMPOTENT_METHODS)
     
     async def post_tweet(self, text: str, reply_to: Optional[str] = None) -> Dict[str, Any]:
         """Post a tweet.
@@ -51,23 +137,21 @@ class TwitterClient:
             if reply_to:
                 tweet_data["reply"] = {"in_reply_to_tweet_id": reply_to}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/tweets",
-                    headers=self.headers,
-                    json=tweet_data
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                tweet_id = result["data"]["id"]
-                return {
-                    "id": tweet_id,
-                    "text": text,
-                    "url": f"https://twitter.com/i/web/status/{tweet_id}"
-                }
+            response = await self._request(
+                "POST", "/tweets",
+                content=orjson.dumps(tweet_data)
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            
+            tweet_id = result["data"]["id"]
+            return {
+                "id": tweet_id,
+                "text": text,
+                "url": f"https://twitter.com/i/web/status/{tweet_id}"
+            }
         except Exception as e:
-            logger.error(f"Failed to post tweet: {e}")
+            logger.error("Failed to post tweet: %s", e)
             raise
     
     async def search_tweets(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
@@ -75,7 +159,8 @@ class TwitterClient:
         
         Args:
             query: Search query
-            max_results: Maximum number of results
+            max_results: Maximum number of results, fetched across pages
+                as needed (capped at SEARCH_MAX_RESULTS)
             
         Returns:
             List of tweet data
@@ -90,26 +175,37 @@ class TwitterClient:
                 }
             ]
         
+        max_results = max(1, min(max_results, SEARCH_MAX_RESULTS))
+        tweets: List[Dict[str, Any]] = []
+        params = {
+            "query": query,
+            "tweet.fields": "author_id,created_at,public_metrics"
+        }
+        
         try:
-            params = {
-                "query": query,
-                "max_results": min(max_results, 100),
-                "tweet.fields": "author_id,created_at,public_metrics"
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/tweets/search/recent",
-                    headers=self.headers,
+            while len(tweets) < max_results:
+                # The API accepts page sizes between 10 and 100
+                remaining = max_results - len(tweets)
+                params["max_results"] = max(SEARCH_PAGE_MIN, min(remaining, SEARCH_PAGE_MAX))
+                
+                response = await self._request(
+                    "GET", "/tweets/search/recent",
                     params=params
                 )
                 response.raise_for_status()
-                result = response.json()
+                result = orjson.loads(response.content)
                 
-                return result.get("data", [])
+                tweets.extend(result.get("data", [])[:remaining])
+                next_token = result.get("meta", {}).get("next_token")
+                if not next_token:
+                    break
+                params["next_token"] = next_token
         except Exception as e:
-            logger.error(f"Failed to search tweets: {e}")
-            return []
+            logger.error("Failed to search tweets: %s", e)
+            if tweets:
+                logger.warning("Returning %d tweets fetched before the failure", len(tweets))
+        
+        return tweets
 
 
 # Default client instance
@@ -0,0 +1 @@
+"""AI agent services."""
\ No newline at end of file
@@ -1,18 +1,35 @@
 """Action functions for the business development agent."""
 
+import asyncio
+import hashlib
 import logging
-import sys
-import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
-# Add parent directories to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from actions.crm import create_lead_from_inquiry, find_existing_contact as crm_find_contact
-from actions.slack import send_notification
+from actions.crm import (
+    create_lead_from_inquiry,
+    find_existing_contact as crm_find_contact,
+    find_existing_contacts as crm_find_contacts
+)
+from actions.slack import send_notification_nowait
 
 logger = logging.getLogger(__name__)
 
+# Context keywords identifying each lead source, checked in order
+_SOURCE_KEYWORDS = {
+    "website_inquiry": frozenset({"website", "contact form", "form"}),
+    "social_media": frozenset({"social", "twitter", "linkedin"}),
+    "referral": frozenset({"referral", "referred"}),
+    "demo_request": frozenset({"demo", "trial"}),
+}
+
+# Free webmail providers; leads from these don't indicate a company domain
+_FREE_EMAIL_DOMAINS = frozenset({"gmail.com", "yahoo.com", "hotmail.com", "outlook.com"})
+_FREE_EMAIL_SUBDOMAIN_SUFFIXES = tuple(f".{provider}" for provider in _FREE_EMAIL_DOMAINS)
+_ENTERPRISE_TLDS = (".com", ".org", ".net")
+
+# Contexts longer than this are analyzed off the event loop
+LEAD_ANALYSIS_OFFLOAD_THRESHOLD = 512
+
 
 async def create_lead(
     name: str, 
@@ -41,9 +58,9 @@ async def create_lead(
             message=context
         )
         
-        # Send notification to sales team
+        # Notify the sales team in the background, only once the lead exists
         priority = "🔥 HIGH PRIORITY" if qualification_score >= 8 else "📋 New Lead"
-        await send_notification(
+        send_notification_nowait(
             "#sales",
             f"{priority} Lead Created",
             f"New lead from {company}:\n"
@@ -53,13 +70,13 @@ async def create_lead(
             f"Context: {context[:100]}..." if context else ""
         )
         
-        logger.info(f"Lead created successfully: {lead_id}")
+        logger.info("Lead created successfully: %s", lead_id)
         return lead_id
         
     except Exception as e:
-        logger.error(f"Failed to create lead: {e}")
-        # Return mock ID for demo
-        return f"lead_{hash(email) % 100000}"
+        logger.error("Failed to create lead: %s", e)
+        # Return mock ID for demo, stable across processes so retries are idempotent
+        return f"lead_{hashlib.blake2b(email.encode(), digest_size=5).hexdigest()}"
 
 
 async def find_existing_contact(email: str) -> Optional[Dict[str, Any]]:
@@ -74,10 +91,26 @@ async def find_existing_contact(email: str) -> Optional[Dict[str, Any]]:
     try:
         return await crm_find_contact(email)
     except Exception as e:
-        logger.error(f"Failed to find existing contact: {e}")
+        logger.error("Failed to find existing contact: %s", e)
         return None
 
 
+async def find_existing_contacts(emails: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Find existing contacts for several emails with batched CRM queries.
+    
+    Args:
+        emails: Contact emails to search for
+        
+    Returns:
+        Mapping of email to contact data for the emails that were found
+    """
+    try:
+        return await crm_find_contacts(emails)
+    except Exception as e:
+        logger.error("Failed to find existing contacts: %s", e)
+        return {}
+
+
 async def schedule_followup(lead_id: str, delay: str = "1 day", notes: str = "") -> bool:
     """Schedule a follow-up task for the lead.
     
@@ -91,10 +124,10 @@ async def schedule_followup(lead_id: str, delay: str = "1 day", notes: str = "")
     """
     try:
         # Mock follow-up scheduling - in production would integrate with CRM task system
-        logger.info(f"Follow-up scheduled for lead {lead_id} in {delay}")
+        logger.info("Follow-up scheduled for lead %s in %s", lead_id, delay)
         
-        # Send notification to sales team
-        await send_notification(
+        # Notify the sales team without waiting on Slack
+        send_notification_nowait(
             "#sales",
             "Follow-up Scheduled",
             f"Follow-up scheduled for lead {lead_id}\n"
@@ -105,7 +138,7 @@ async def schedule_followup(lead_id: str, delay: str = "1 day", notes: str = "")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to schedule follow-up: {e}")
+        logger.error("Failed to schedule follow-up: %s", e)
         return False
 
 
@@ -122,32 +155,10 @@ async def send_welcome_email(lead_email: str, lead_name: str, company: str) -> b
     """
     try:
         # Mock email sending - in production would integrate with email service
-        email_content = f"""
-        Subject: Welcome to AI-Powered Business Ecosystem
+        logger.info("Welcome email sent to %s", lead_email)
         
-        Dear {lead_name},
-        
-        Thank you for your interest in our AI-Powered Business Ecosystem!
-        
-        We're excited to help {company} automate and optimize your business processes 
-        with our cutting-edge AI agents for:
-        
-        • Code Generation & Development
-        • Marketing & Social Media
-        • Security & Compliance
-        • Business Development & CRM
-        
-        A member of our team will be in touch shortly to discuss how we can help 
-        streamline your operations.
-        
-        Best regards,
-        The AI Ecosystem Team
-        """
-        
-        logger.info(f"Welcome email sent to {lead_email}")
-        
-        # Send notification to marketing team
-        await send_notification(
+        # Notify the marketing team without waiting on Slack
+        send_notification_nowait(
             "#marketing",
             "Welcome Email Sent",
             f"Welcome email sent to {lead_name} at {company}"
@@ -156,13 +167,16 @@ async def send_welcome_email(lead_email: str, lead_name: str, company: str) -> b
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send welcome email: {e}")
+        logger.error("Failed to send welcome email: %s", e)
         return False
 
 
 async def analyze_lead_source(context: str, email: str) -> Dict[str, Any]:
     """Analyze the source and quality of a lead.
     
+    Long contexts are analyzed in a worker thread so the scan doesn't
+    block other requests on the event loop.
+    
     Args:
         context: Context information about how the lead was acquired
         email: Lead's email domain for company analysis
@@ -170,28 +184,39 @@ async def analyze_lead_source(context: str, email: str) -> Dict[str, Any]:
     Returns:
         Analysis results including source, quality indicators, and recommendations
     """
+    if len(context) > LEAD_ANALYSIS_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_analyze_lead_source_sync, context, email)
+    return _analyze_lead_source_sync(context, email)
+
+
+def _analyze_lead_source_sync(context: str, email: str) -> Dict[str, Any]:
+    """Synchronous implementation of analyze_lead_source."""
     try:
         # Extract domain for company size estimation
-        domain = email.split('@')[1] if '@' in email else ""
+        _, at, domain = email.rpartition('@')
+        if not at:
+            domain = ""
+        
+        # Free webmail providers, matched on whole domain labels
+        free_email = domain in _FREE_EMAIL_DOMAINS or domain.endswith(_FREE_EMAIL_SUBDOMAIN_SUFFIXES)
         
         # Simple heuristics for lead quality
         quality_indicators = {
-            "enterprise_domain": domain.endswith(('.com', '.org', '.net')) and not domain.endswith(('gmail.com', 'yahoo.com', 'hotmail.com')),
+            "enterprise_domain": domain.endswith(_ENTERPRISE_TLDS) and not free_email,
             "has_context": len(context.strip()) > 0,
             "context_length": len(context),
-            "professional_email": not any(provider in domain for provider in ['gmail', 'yahoo', 'hotmail', 'outlook'])
+            "professional_email": not free_email
         }
         
-        # Determine lead source from context keywords
-        source = "unknown"
-        if any(keyword in context.lower() for keyword in ['website', 'contact form', 'form']):
-            source = "website_inquiry"
-        elif any(keyword in context.lower() for keyword in ['social', 'twitter', 'linkedin']):
-            source = "social_media"
-        elif any(keyword in context.lower() for keyword in ['referral', 'referred']):
-            source = "referral"
-        elif any(keyword in context.lower() for keyword in ['demo', 'trial']):
-            source = "demo_request"
+        # Determine lead source from context keywords (first match wins)
+        context_lower = context.lower()
+        source = next(
+            (
+                lead_source for lead_source, keywords in _SOURCE_KEYWORDS.items()
+                if any(keyword in context_lower for keyword in keywords)
+            ),
+            "unknown"
+        )
         
         # Calculate quality score
         quality_score = 5.0  # Base score
@@ -230,11 +255,11 @@ async def analyze_lead_source(context: str, email: str) -> Dict[str, Any]:
         if not quality_indicators["professional_email"]:
             analysis["recommendations"].append("Verify business legitimacy")
         
-        logger.info(f"Lead analysis completed: {source} source, {quality_score}/10 quality")
+        logger.info("Lead analysis completed: %s source, %s/10 quality", source, quality_score)
         return analysis
         
     except Exception as e:
-        logger.error(f"Lead analysis failed: {e}")
+        logger.error("Lead analysis failed: %s", e)
         return {
             "source": "unknown",
             "quality_score": 5.0,
@@ -255,11 +280,11 @@ async def update_lead_status(lead_id: str, status: str, notes: str = "") -> bool
     """
     try:
         # Mock status update - in production would integrate with CRM API
-        logger.info(f"Lead {lead_id} status updated to: {status}")
+        logger.info("Lead %s status updated to: %s", lead_id, status)
         
-        # Send notification for important status changes
+        # Send notification for important status changes, without waiting on Slack
         if status in ['qualified', 'converted', 'lost']:
-            await send_notification(
+            send_notification_nowait(
                 "#sales",
                 f"Lead Status Update: {status.title()}",
                 f"Lead {lead_id} status changed to {status}\n"
@@ -269,5 +294,5 @@ async def update_lead_status(lead_id: str, status: str, notes: str = "") -> bool
         return True
         
     except Exception as e:
-        logger.error(f"Failed to update lead status: {e}")
+        logger.error("Failed to update lead status: %s", e)
         return False
\ No newline at end of file
@@ -1,20 +1,79 @@
 """Business development agent implementation using LangGraph."""
 
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, TypedDict
+import weakref
+from typing import Dict, Any, List, TypedDict
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_core.messages import HumanMessage, SystemMessage
-import sys
+from pydantic import BaseModel, Field, field_validator
+import aiosqlite
 import os
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from llm.openai_client import llm
 from agents.bizdev_agent.actions import create_lead, find_existing_contact, schedule_followup, send_welcome_email
 
 logger = logging.getLogger(__name__)
 
+# SQLite database holding workflow checkpoints, so an interrupted run can resume
+CHECKPOINT_DB = os.getenv("AGENT_CHECKPOINT_DB", "agent_state.db")
+
+# One lock per checkpoint thread, so identical concurrent requests in this worker
+# don't advance the same thread at once
+_thread_locks = weakref.WeakValueDictionary()
+
+
+# System prompt for lead analysis
+_ANALYZE_SYSTEM_PROMPT = (
+    "You are a business development expert analyzing sales leads. "
+    "Assess the lead quality, identify key opportunities, and provide "
+    "qualification insights based on the available information."
+)
+
+# Lead analysis request, formatted with the workflow state
+_ANALYZE_USER_PROMPT = """\
+Analyze this lead and provide:
+1. Lead qualification score (0-10)
+2. Key opportunities and pain points
+3. Recommended next steps
+4. Timeline estimate for potential deal
+
+Lead information:
+Name: {lead_name}
+Email: {lead_email}
+Company: {lead_company}
+Context: {context}
+"""
+
+DEFAULT_RECOMMENDATIONS = (
+    "Schedule discovery call within 48 hours",
+    "Send relevant case studies and product information",
+    "Connect with decision makers",
+    "Identify budget and timeline requirements"
+)
+
+
+class LeadAnalysis(BaseModel):
+    """Structured lead analysis returned by the LLM."""
+    qualification_score: float = Field(
+        default=7.5, description="Lead qualification score (0-10)"
+    )
+    opportunities: List[str] = Field(
+        default_factory=list, description="Key opportunities and pain points"
+    )
+    recommendations: List[str] = Field(
+        default_factory=list, description="Recommended next steps"
+    )
+    timeline: str = Field(default="", description="Timeline estimate for potential deal")
+    
+    @field_validator("qualification_score")
+    @classmethod
+    def _clamp_score(cls, v: float) -> float:
+        """Clamp out-of-range scores instead of rejecting the whole analysis."""
+        return min(max(v, 0.0), 10.0)
+
 
 class BizDevState(TypedDict):
     """State for the business development agent workflow."""
@@ -28,179 +87,177 @@ class BizDevState(TypedDict):
     welcome_sent: bool
     qualification_score: float
     recommendations: list
-    error: str
+    opportunities: list
+    timeline: str
+
+
+async def _analyze_lead(state: BizDevState) -> BizDevState:
+    """Analyze and qualify the lead."""
+    try:
+        logger.info(f"Analyzing lead: {state['lead_name']} from {state['lead_company']}")
+        
+        # Use LLM to analyze lead quality and potential
+        messages = [
+            SystemMessage(content=_ANALYZE_SYSTEM_PROMPT),
+            HumanMessage(content=_ANALYZE_USER_PROMPT.format_map(state))
+        ]
+        
+        analysis = await llm.agenerate_structured(messages, LeadAnalysis)
+        if analysis is None:
+            # Demo mode or LLM failure - fall back to defaults
+            analysis = LeadAnalysis()
+        
+        qualification_score = analysis.qualification_score
+        recommendations = analysis.recommendations or list(DEFAULT_RECOMMENDATIONS)
+        
+        logger.info(f"Lead qualification completed: {qualification_score}/10")
+        return {
+            **state, 
+            "qualification_score": qualification_score,
+            "recommendations": recommendations,
+            "opportunities": analysis.opportunities,
+            "timeline": analysis.timeline
+        }
+        
+    except Exception as e:
+        logger.error(f"Lead analysis failed: {e}")
+        raise
+
+
+async def _check_existing_contact(state: BizDevState) -> BizDevState:
+    """Check if contact already exists in CRM."""
+    try:
+        logger.info(f"Checking for existing contact: {state['lead_email']}")
+        
+        existing_contact = await find_existing_contact(state['lead_email'])
+        
+        if existing_contact:
+            logger.info(f"Found existing contact: {existing_contact.get('Id', 'Unknown')}")
+        else:
+            logger.info("No existing contact found")
+        
+        return {**state, "existing_contact": existing_contact or {}}
+        
+    except Exception as e:
+        logger.error(f"Contact lookup failed: {e}")
+        raise
+
+
+async def _analyze_and_lookup(state: BizDevState) -> BizDevState:
+    """Analyze the lead and check the CRM for an existing contact concurrently."""
+    analyzed, looked_up = await asyncio.gather(
+        _analyze_lead(state),
+        _check_existing_contact(state)
+    )
+    return {**analyzed, "existing_contact": looked_up["existing_contact"]}
+
+
+async def _create_crm_record(state: BizDevState) -> BizDevState:
+    """Create or update CRM record."""
+    try:
+        existing_contact = state["existing_contact"]
+        
+        if existing_contact:
+            logger.info("Updating existing contact record")
+            # In a real implementation, would update the existing record
+            lead_id = existing_contact.get("Id", "")
+        else:
+            logger.info("Creating new lead record")
+            lead_id = await create_lead(
+                name=state["lead_name"],
+                email=state["lead_email"],
+                company=state["lead_company"],
+                context=state["context"],
+                qualification_score=state["qualification_score"]
+            )
+        
+        logger.info(f"CRM record processed: {lead_id}")
+        return {**state, "lead_id": lead_id}
+        
+    except Exception as e:
+        logger.error(f"CRM record creation failed: {e}")
+        raise
+
+
+async def _setup_followup_actions(state: BizDevState) -> BizDevState:
+    """Setup follow-up actions and communications."""
+    try:
+        logger.info("Setting up follow-up actions")
+        
+        lead_id = state["lead_id"]
+        qualification_score = state["qualification_score"]
+        
+        # Schedule follow-up based on qualification score
+        followup_delay = "1 day" if qualification_score >= 8 else "3 days"
+        
+        # Schedule the follow-up and send the welcome email concurrently
+        followup_scheduled, welcome_sent = await asyncio.gather(
+            schedule_followup(
+                lead_id=lead_id,
+                delay=followup_delay,
+                notes=f"High-priority lead (score: {qualification_score})" if qualification_score >= 8 else "Standard follow-up"
+            ),
+            send_welcome_email(
+                lead_email=state["lead_email"],
+                lead_name=state["lead_name"],
+                company=state["lead_company"]
+            )
+        )
+        
+        logger.info(f"Follow-up actions completed. Follow-up scheduled: {followup_scheduled}, Welcome sent: {welcome_sent}")
+        return {
+            **state, 
+            "followup_scheduled": followup_scheduled,
+            "welcome_sent": welcome_sent
+        }
+        
+    except Exception as e:
+        logger.error(f"Follow-up setup failed: {e}")
+        raise
 
 
 class BizDevAgent:
     """AI agent for business development and lead management."""
     
+    # Compiled workflow shared by all instances; the nodes hold no per-instance state
+    graph = None
+    workflow = None
+    checkpointer = None
+    
     def __init__(self):
         """Initialize the business development agent with StateGraph workflow."""
-        self.graph = StateGraph(BizDevState)
-        self._build_graph()
-        self.workflow = self.graph.compile()
+        if BizDevAgent.graph is None:
+            BizDevAgent.graph = StateGraph(BizDevState)
+            self._build_graph()
+    
+    def _get_workflow(self):
+        """Compile the workflow on first use.
+        
+        The SQLite checkpointer binds to the running event loop, so it can't
+        be created before one is running.
+        """
+        if BizDevAgent.workflow is None:
+            BizDevAgent.checkpointer = AsyncSqliteSaver(aiosqlite.connect(CHECKPOINT_DB))
+            BizDevAgent.workflow = BizDevAgent.graph.compile(checkpointer=BizDevAgent.checkpointer)
+        return BizDevAgent.workflow
+    
+    async def aclose(self):
+        """Close the checkpoint database connection."""
+        if BizDevAgent.checkpointer is not None:
+            await BizDevAgent.checkpointer.conn.close()
+            BizDevAgent.checkpointer = None
+            BizDevAgent.workflow = None
     
     def _build_graph(self):
         """Build the StateGraph workflow."""
-        
-        async def analyze_lead(state: BizDevState) -> BizDevState:
-            """Analyze and qualify the lead."""
-            try:
-                logger.info(f"Analyzing lead: {state['lead_name']} from {state['lead_company']}")
-                
-                # Use LLM to analyze lead quality and potential
-                system_prompt = (
-                    "You are a business development expert analyzing sales leads. "
-                    "Assess the lead quality, identify key opportunities, and provide "
-                    "qualification insights based on the available information."
-                )
-                
-                lead_info = f"""
-                Name: {state['lead_name']}
-                Email: {state['lead_email']}
-                Company: {state['lead_company']}
-                Context: {state['context']}
-                """
-                
-                user_prompt = f"""
-                Analyze this lead and provide:
-                1. Lead qualification score (0-10)
-                2. Key opportunities and pain points
-                3. Recommended next steps
-                4. Timeline estimate for potential deal
-                
-                Lead information: {lead_info}
-                """
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                response = await llm.agenerate(messages)
-                analysis = response[0].content
-                
-                # Extract qualification score from LLM response
-                # Simple heuristic - in production would use more sophisticated parsing
-                qualification_score = 7.5  # Default score
-                if "score" in analysis.lower():
-                    try:
-                        # Look for patterns like "score: 8" or "8/10"
-                        import re
-                        score_match = re.search(r'score[:\s]*(\d+(?:\.\d+)?)', analysis.lower())
-                        if score_match:
-                            qualification_score = float(score_match.group(1))
-                            if qualification_score > 10:
-                                qualification_score = qualification_score / 10
-                    except:
-                        pass
-                
-                recommendations = [
-                    "Schedule discovery call within 48 hours",
-                    "Send relevant case studies and product information",
-                    "Connect with decision makers",
-                    "Identify budget and timeline requirements"
-                ]
-                
-                logger.info(f"Lead qualification completed: {qualification_score}/10")
-                return {
-                    **state, 
-                    "qualification_score": qualification_score,
-                    "recommendations": recommendations
-                }
-                
-            except Exception as e:
-                logger.error(f"Lead analysis failed: {e}")
-                return {**state, "error": str(e)}
-        
-        async def check_existing_contact(state: BizDevState) -> BizDevState:
-            """Check if contact already exists in CRM."""
-            try:
-                logger.info(f"Checking for existing contact: {state['lead_email']}")
-                
-                existing_contact = await find_existing_contact(state['lead_email'])
-                
-                if existing_contact:
-                    logger.info(f"Found existing contact: {existing_contact.get('Id', 'Unknown')}")
-                else:
-                    logger.info("No existing contact found")
-                
-                return {**state, "existing_contact": existing_contact or {}}
-                
-            except Exception as e:
-                logger.error(f"Contact lookup failed: {e}")
-                return {**state, "error": str(e)}
-        
-        async def create_crm_record(state: BizDevState) -> BizDevState:
-            """Create or update CRM record."""
-            try:
-                existing_contact = state["existing_contact"]
-                
-                if existing_contact:
-                    logger.info("Updating existing contact record")
-                    # In a real implementation, would update the existing record
-                    lead_id = existing_contact.get("Id", "")
-                else:
-                    logger.info("Creating new lead record")
-                    lead_id = await create_lead(
-                        name=state["lead_name"],
-                        email=state["lead_email"],
-                        company=state["lead_company"],
-                        context=state["context"],
-                        qualification_score=state["qualification_score"]
-                    )
-                
-                logger.info(f"CRM record processed: {lead_id}")
-                return {**state, "lead_id": lead_id}
-                
-            except Exception as e:
-                logger.error(f"CRM record creation failed: {e}")
-                return {**state, "error": str(e)}
-        
-        async def setup_followup_actions(state: BizDevState) -> BizDevState:
-            """Setup follow-up actions and communications."""
-            try:
-                logger.info("Setting up follow-up actions")
-                
-                lead_id = state["lead_id"]
-                qualification_score = state["qualification_score"]
-                
-                # Schedule follow-up based on qualification score
-                followup_delay = "1 day" if qualification_score >= 8 else "3 days"
-                followup_scheduled = await schedule_followup(
-                    lead_id=lead_id,
-                    delay=followup_delay,
-                    notes=f"High-priority lead (score: {qualification_score})" if qualification_score >= 8 else "Standard follow-up"
-                )
-                
-                # Send welcome email
-                welcome_sent = await send_welcome_email(
-                    lead_email=state["lead_email"],
-                    lead_name=state["lead_name"],
-                    company=state["lead_company"]
-                )
-                
-                logger.info(f"Follow-up actions completed. Follow-up scheduled: {followup_scheduled}, Welcome sent: {welcome_sent}")
-                return {
-                    **state, 
-                    "followup_scheduled": followup_scheduled,
-                    "welcome_sent": welcome_sent
-                }
-                
-            except Exception as e:
-                logger.error(f"Follow-up setup failed: {e}")
-                return {**state, "error": str(e)}
-        
         # Add nodes to the graph
-        self.graph.add_node("analyze", analyze_lead)
-        self.graph.add_node("check_contact", check_existing_contact)
-        self.graph.add_node("create_record", create_crm_record)
-        self.graph.add_node("setup_followup", setup_followup_actions)
+        self.graph.add_node("analyze_and_lookup", _analyze_and_lookup)
+        self.graph.add_node("create_record", _create_crm_record)
+        self.graph.add_node("setup_followup", _setup_followup_actions)
         
         # Add edges
-        self.graph.add_edge(START, "analyze")
-        self.graph.add_edge("analyze", "check_contact")
-        self.graph.add_edge("check_contact", "create_record")
+        self.graph.add_edge(START, "analyze_and_lookup")
+        self.graph.add_edge("analyze_and_lookup", "create_record")
         self.graph.add_edge("create_record", "setup_followup")
         self.graph.add_edge("setup_followup", END)
     
@@ -227,25 +284,49 @@ class BizDevAgent:
             welcome_sent=False,
             qualification_score=0.0,
             recommendations=[],
-            error=""
+            opportunities=[],
+            timeline=""
         )
         
-        try:
-            final_state = await self.workflow.ainvoke(initial_state)
-            
-            if final_state.get("error"):
-                return {"success": False, "error": final_state["error"]}
-            
-            return {
-                "success": True,
-                "lead_id": final_state["lead_id"],
-                "qualification_score": final_state["qualification_score"],
-                "existing_contact": bool(final_state["existing_contact"]),
-                "followup_scheduled": final_state["followup_scheduled"],
-                "welcome_sent": final_state["welcome_sent"],
-                "recommendations": final_state["recommendations"]
-            }
+        # Retries of the same lead share a checkpoint thread
+        thread_key = f"{lead_email}:{context}"
+        thread_id = hashlib.blake2b(thread_key.encode(), digest_size=16).hexdigest()
+        config = {"configurable": {"thread_id": thread_id}}
+        
+        lock = _thread_locks.setdefault(thread_id, asyncio.Lock())
+        async with lock:
+            try:
+                workflow = self._get_workflow()
+                
+                # Resume a failed or interrupted run from its last checkpoint
+                # instead of starting over
+                snapshot = await workflow.aget_state(config)
+                if snapshot.next:
+                    logger.info(f"Resuming workflow at: {', '.join(snapshot.next)}")
+                    final_state = await workflow.ainvoke(None, config)
+                else:
+                    final_state = await workflow.ainvoke(initial_state, config)
+                
+            except Exception as e:
+                # The failed step's checkpoint is kept, so a retry resumes there
+                logger.error(f"BizDev agent workflow failed: {e}")
+                return {"success": False, "error": str(e)}
             
-        except Exception as e:
-            logger.error(f"BizDev agent workflow failed: {e}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            # A completed run has nothing left to resume, so drop its checkpoints.
+            # The lead already exists, so a failure here must not fail the request.
+            try:
+                await BizDevAgent.checkpointer.adelete_thread(thread_id)
+            except Exception as e:
+                logger.warning(f"Failed to delete checkpoints for thread {thread_id}: {e}")
+        
+        return {
+            "success": True,
+            "lead_id": final_state["lead_id"],
+            "qualification_score": final_state["qualification_score"],
+            "existing_contact": bool(final_state["existing_contact"]),
+            "followup_scheduled": final_state["followup_scheduled"],
+            "welcome_sent": final_state["welcome_sent"],
+            "recommendations": final_state["recommendations"],
+            "opportunities": final_state["opportunities"],
+            "timeline": final_state["timeline"]
+        }
\ No newline at end of file
@@ -1,26 +1,42 @@
 """HTTP server for the business development agent."""
 
 import logging
-import sys
 import os
+from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
+from actions.crm import crm_client
+from actions.slack import flush_notifications, slack_client
 from agents.bizdev_agent.agent import BizDevAgent
+from llm.openai_client import llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(title="Business Development Agent", description="AI-powered lead management and CRM automation")
 
-# Initialize agent
-bizdev_agent = BizDevAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the agent once per worker; on shutdown drain notifications and close connections."""
+    app.state.agent = BizDevAgent()
+    yield
+    await flush_notifications()
+    await app.state.agent.aclose()
+    await crm_client.aclose()
+    await slack_client.aclose()
+    await llm.aclose()
+
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Business Development Agent",
+    description="AI-powered lead management and CRM automation",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 
 class LeadRequest(BaseModel):
@@ -40,16 +56,18 @@ class LeadResponse(BaseModel):
     followup_scheduled: bool = False
     welcome_sent: bool = False
     recommendations: list = []
+    opportunities: list = []
+    timeline: str = ""
     error: str = ""
 
 
 @app.post("/process_lead", response_model=LeadResponse)
-async def process_lead(request: LeadRequest):
+async def process_lead(request: LeadRequest, http_request: Request):
     """Process a new lead through the business development workflow."""
     try:
         logger.info(f"Processing lead: {request.lead_name} from {request.lead_company}")
         
-        result = await bizdev_agent.process(
+        result = await http_request.app.state.agent.process(
             lead_name=request.lead_name,
             lead_email=request.lead_email,
             lead_company=request.lead_company,
@@ -80,4 +98,11 @@ async def root():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8084)
\ No newline at end of file
+    uvicorn.run(
+        "agents.bizdev_agent.server:app",
+        host="0.0.0.0",
+        port=8084,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
\ No newline at end of file
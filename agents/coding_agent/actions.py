@@ -1,13 +1,8 @@
 """Action functions for the coding agent."""
 
 import logging
-import sys
-import os
 from typing import Dict, Any, List
 
-# Add parent directories to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from actions.gitlab import create_merge_request as gitlab_create_mr, commit_code_changes
 
 logger = logging.getLogger(__name__)
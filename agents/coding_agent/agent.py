@@ -1,20 +1,50 @@
 """Coding agent implementation using LangGraph."""
 
+import asyncio
+import hashlib
 import logging
+import weakref
 from typing import Dict, Any, List, TypedDict
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_core.messages import HumanMessage, SystemMessage
-import sys
+import aiosqlite
 import os
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from llm.openai_client import llm
 from agents.coding_agent.actions import analyze_code, generate_code, create_merge_request
 
 logger = logging.getLogger(__name__)
 
+# SQLite database holding workflow checkpoints, so an interrupted run can resume
+CHECKPOINT_DB = os.getenv("AGENT_CHECKPOINT_DB", "agent_state.db")
+
+# One lock per checkpoint thread, so identical concurrent requests in this worker
+# don't advance the same thread at once
+_thread_locks = weakref.WeakValueDictionary()
+
+# System prompts for requirements analysis and code generation
+_ANALYZE_SYSTEM_PROMPT = (
+    "You are a senior software engineer analyzing code requirements. "
+    "Break down the requirements into specific implementation tasks."
+)
+_GENERATE_SYSTEM_PROMPT = (
+    "You are an expert programmer. Generate clean, well-documented code "
+    "that implements the given requirements. Follow best practices and "
+    "include error handling."
+)
+
+# Code generation request, formatted with the workflow state and LLM analysis
+_GENERATE_USER_PROMPT = """\
+Repository: {repo}
+Branch: {branch}
+Requirements: {requirements}
+Analysis: {llm_analysis}
+
+Generate code files that implement these requirements.
+Respond with a JSON-like format showing file paths and content.
+"""
+
 
 class CodingState(TypedDict):
     """State for the coding agent workflow."""
@@ -27,109 +57,82 @@ class CodingState(TypedDict):
     error: str
 
 
-class CodingAgent:
-    """AI agent for automated code generation and repository management."""
-    
-    def __init__(self):
-        """Initialize the coding agent with StateGraph workflow."""
-        self.graph = StateGraph(CodingState)
-        self._build_graph()
-        self.workflow = self.graph.compile()
-    
-    def _build_graph(self):
-        """Build the StateGraph workflow."""
+async def _analyze_requirements(state: CodingState) -> CodingState:
+    """Analyze code requirements and repository structure."""
+    try:
+        logger.info(f"Analyzing requirements for repo: {state['repo']}")
         
-        async def analyze_requirements(state: CodingState) -> CodingState:
-            """Analyze code requirements and repository structure."""
-            try:
-                logger.info(f"Analyzing requirements for repo: {state['repo']}")
-                
-                # Use LLM to analyze requirements
-                system_prompt = (
-                    "You are a senior software engineer analyzing code requirements. "
-                    "Break down the requirements into specific implementation tasks."
-                )
-                user_prompt = f"Requirements: {state['requirements']}"
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                response = await llm.agenerate(messages)
-                analysis_text = response[0].content
-                
-                # Perform repository analysis
-                analysis = await analyze_code(state['repo'], state['branch'])
-                analysis['llm_analysis'] = analysis_text
-                
-                return {**state, "analysis": analysis}
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze requirements: {e}")
-                return {**state, "error": str(e)}
+        # Use LLM to analyze requirements
+        messages = [
+            SystemMessage(content=_ANALYZE_SYSTEM_PROMPT),
+            HumanMessage(content=f"Requirements: {state['requirements']}")
+        ]
         
-        async def generate_implementation(state: CodingState) -> CodingState:
-            """Generate code implementation based on analysis."""
-            try:
-                logger.info("Generating code implementation")
-                
-                analysis = state['analysis']
-                
-                # Use LLM to generate code
-                system_prompt = (
-                    "You are an expert programmer. Generate clean, well-documented code "
-                    "that implements the given requirements. Follow best practices and "
-                    "include error handling."
-                )
-                
-                context_prompt = f"""
-                Repository: {state['repo']}
-                Branch: {state['branch']}
-                Requirements: {state['requirements']}
-                Analysis: {analysis.get('llm_analysis', '')}
-                
-                Generate code files that implement these requirements.
-                Respond with a JSON-like format showing file paths and content.
-                """
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=context_prompt)
-                ]
-                
-                response = await llm.agenerate(messages)
-                generated_text = response[0].content
-                
-                # Generate actual code files
-                generated_code = await generate_code(state['requirements'], analysis)
-                
-                # Add LLM-generated insights to the code
-                generated_code.append({
-                    "file_path": "AI_IMPLEMENTATION_NOTES.md",
-                    "content": f"# AI Implementation Notes\n\n{generated_text}",
-                    "action": "create"
-                })
-                
-                return {**state, "generated_code": generated_code}
-                
-            except Exception as e:
-                logger.error(f"Failed to generate code: {e}")
-                return {**state, "error": str(e)}
+        response = await llm.agenerate(messages)
+        analysis_text = response[0].content
         
-        async def create_pull_request(state: CodingState) -> CodingState:
-            """Create a pull request with the generated code."""
-            try:
-                logger.info("Creating merge request")
-                
-                generated_code = state['generated_code']
-                
-                if not generated_code:
-                    return {**state, "error": "No code generated to commit"}
-                
-                # Create merge request
-                title = f"AI-Generated Implementation: {state['requirements'][:50]}..."
-                description = f"""
+        # Perform repository analysis
+        analysis = await analyze_code(state['repo'], state['branch'])
+        analysis['llm_analysis'] = analysis_text
+        
+        return {**state, "analysis": analysis}
+        
+    except Exception as e:
+        logger.error(f"Failed to analyze requirements: {e}")
+        raise
+
+
+async def _generate_implementation(state: CodingState) -> CodingState:
+    """Generate code implementation based on analysis."""
+    try:
+        logger.info("Generating code implementation")
+        
+        analysis = state['analysis']
+        
+        # Use LLM to generate code
+        context_prompt = _GENERATE_USER_PROMPT.format_map(
+            {**state, "llm_analysis": analysis.get('llm_analysis', '')}
+        )
+        messages = [
+            SystemMessage(content=_GENERATE_SYSTEM_PROMPT),
+            HumanMessage(content=context_prompt)
+        ]
+        
+        response = await llm.agenerate(messages)
+        generated_text = response[0].content
+        
+        # Generate actual code files
+        generated_code = await generate_code(state['requirements'], analysis)
+        
+        # Add LLM-generated insights to the code
+        generated_code.append({
+            "file_path": "AI_IMPLEMENTATION_NOTES.md",
+            "content": f"# AI Implementation Notes\n\n{generated_text}",
+            "action": "create"
+        })
+        
+        return {**state, "generated_code": generated_code}
+        
+    except Exception as e:
+        logger.error(f"Failed to generate code: {e}")
+        raise
+
+
+async def _create_pull_request(state: CodingState) -> CodingState:
+    """Create a pull request with the generated code."""
+    try:
+        logger.info("Creating merge request")
+        
+        generated_code = state['generated_code']
+        
+        if not generated_code:
+            return {**state, "error": "No code generated to commit"}
+        
+        # Create merge request
+        requirements = state['requirements']
+        summary = requirements if len(requirements) <= 50 else requirements[:47] + "..."
+        title = f"AI-Generated Implementation: {summary}"
+        description = f"""
 # AI-Generated Code Implementation
 
 ## Requirements
@@ -143,27 +146,62 @@ class CodingAgent:
 
 This code was automatically generated by the AI Coding Agent.
 Please review carefully before merging.
-                """
-                
-                mr_url = await create_merge_request(
-                    repo=state['repo'],
-                    branch=state['branch'],
-                    title=title,
-                    description=description,
-                    files=generated_code
-                )
-                
-                logger.info(f"Created merge request: {mr_url}")
-                return {**state, "merge_request_url": mr_url}
-                
-            except Exception as e:
-                logger.error(f"Failed to create merge request: {e}")
-                return {**state, "error": str(e)}
+        """
         
+        mr_url = await create_merge_request(
+            repo=state['repo'],
+            branch=state['branch'],
+            title=title,
+            description=description,
+            files=generated_code
+        )
+        
+        logger.info(f"Created merge request: {mr_url}")
+        return {**state, "merge_request_url": mr_url}
+        
+    except Exception as e:
+        logger.error(f"Failed to create merge request: {e}")
+        raise
+
+
+class CodingAgent:
+    """AI agent for automated code generation and repository management."""
+    
+    # Compiled workflow shared by all instances; the nodes hold no per-instance state
+    graph = None
+    workflow = None
+    checkpointer = None
+    
+    def __init__(self):
+        """Initialize the coding agent with StateGraph workflow."""
+        if CodingAgent.graph is None:
+            CodingAgent.graph = StateGraph(CodingState)
+            self._build_graph()
+    
+    def _get_workflow(self):
+        """Compile the workflow on first use.
+        
+        The SQLite checkpointer binds to the running event loop, so it can't
+        be created before one is running.
+        """
+        if CodingAgent.workflow is None:
+            CodingAgent.checkpointer = AsyncSqliteSaver(aiosqlite.connect(CHECKPOINT_DB))
+            CodingAgent.workflow = CodingAgent.graph.compile(checkpointer=CodingAgent.checkpointer)
+        return CodingAgent.workflow
+    
+    async def aclose(self):
+        """Close the checkpoint database connection."""
+        if CodingAgent.checkpointer is not None:
+            await CodingAgent.checkpointer.conn.close()
+            CodingAgent.checkpointer = None
+            CodingAgent.workflow = None
+    
+    def _build_graph(self):
+        """Build the StateGraph workflow."""
         # Add nodes to the graph
-        self.graph.add_node("analyze", analyze_requirements)
-        self.graph.add_node("generate", generate_implementation)
-        self.graph.add_node("create_pr", create_pull_request)
+        self.graph.add_node("analyze", _analyze_requirements)
+        self.graph.add_node("generate", _generate_implementation)
+        self.graph.add_node("create_pr", _create_pull_request)
         
         # Add edges
         self.graph.add_edge(START, "analyze")
@@ -192,19 +230,43 @@ Please review carefully before merging.
             error=""
         )
         
-        try:
-            final_state = await self.workflow.ainvoke(initial_state)
+        # Retries of the same request share a checkpoint thread
+        thread_key = f"{repo}:{branch}:{requirements}"
+        thread_id = hashlib.blake2b(thread_key.encode(), digest_size=16).hexdigest()
+        config = {"configurable": {"thread_id": thread_id}}
+        
+        lock = _thread_locks.setdefault(thread_id, asyncio.Lock())
+        async with lock:
+            try:
+                workflow = self._get_workflow()
+                
+                # Resume a failed or interrupted run from its last checkpoint
+                # instead of starting over
+                snapshot = await workflow.aget_state(config)
+                if snapshot.next:
+                    logger.info(f"Resuming workflow at: {', '.join(snapshot.next)}")
+                    final_state = await workflow.ainvoke(None, config)
+                else:
+                    final_state = await workflow.ainvoke(initial_state, config)
+                
+            except Exception as e:
+                # The failed step's checkpoint is kept, so a retry resumes there
+                logger.error(f"Coding agent workflow failed: {e}")
+                return {"success": False, "error": str(e)}
             
             if final_state.get("error"):
                 return {"success": False, "error": final_state["error"]}
             
-            return {
-                "success": True,
-                "merge_request_url": final_state["merge_request_url"],
-                "files_created": len(final_state["generated_code"]),
-                "analysis": final_state["analysis"]
-            }
-            
-        except Exception as e:
-            logger.error(f"Coding agent workflow failed: {e}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            # A completed run has nothing left to resume, so drop its checkpoints.
+            # The merge request already exists, so a failure here must not fail the request.
+            try:
+                await CodingAgent.checkpointer.adelete_thread(thread_id)
+            except Exception as e:
+                logger.warning(f"Failed to delete checkpoints for thread {thread_id}: {e}")
+        
+        return {
+            "success": True,
+            "merge_request_url": final_state["merge_request_url"],
+            "files_created": len(final_state["generated_code"]),
+            "analysis": final_state["analysis"]
+        }
\ No newline at end of file
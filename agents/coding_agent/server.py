@@ -1,26 +1,39 @@
 """HTTP server for the coding agent."""
 
 import logging
-import sys
 import os
+from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
+from actions.gitlab import gitlab_client
 from agents.coding_agent.agent import CodingAgent
+from llm.openai_client import llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(title="Coding Agent", description="AI-powered code generation agent")
 
-# Initialize agent
-coding_agent = CodingAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the agent once per worker process; close it and API clients on shutdown."""
+    app.state.agent = CodingAgent()
+    yield
+    await app.state.agent.aclose()
+    await gitlab_client.aclose()
+    await llm.aclose()
+
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Coding Agent",
+    description="AI-powered code generation agent",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 
 class CodingRequest(BaseModel):
@@ -40,12 +53,12 @@ class CodingResponse(BaseModel):
 
 
 @app.post("/generate", response_model=CodingResponse)
-async def generate_code(request: CodingRequest):
+async def generate_code(request: CodingRequest, http_request: Request):
     """Generate code based on requirements."""
     try:
         logger.info(f"Processing coding request for repo: {request.repo}")
         
-        result = await coding_agent.process(
+        result = await http_request.app.state.agent.process(
             repo=request.repo,
             branch=request.branch,
             requirements=request.requirements
@@ -75,4 +88,11 @@ async def root():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8081)
\ No newline at end of file
+    uvicorn.run(
+        "agents.coding_agent.server:app",
+        host="0.0.0.0",
+        port=8081,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
\ No newline at end of file
@@ -1,18 +1,45 @@
 """Action functions for the marketing agent."""
 
 import logging
-import sys
-import os
+import secrets
+from functools import lru_cache
 from typing import Dict, Any, List
-
-# Add parent directories to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+import ahocorasick
 
 from actions.twitter import post_tweet as twitter_post
 from actions.slack import send_notification
 
 logger = logging.getLogger(__name__)
 
+# Simple sentiment lexicons - in production would use ML models
+_SENTIMENT_CATEGORIES = {
+    "positive": (
+        "excited", "amazing", "great", "awesome", "fantastic", "love",
+        "excellent", "wonderful", "perfect", "incredible", "outstanding"
+    ),
+    "negative": (
+        "terrible", "awful", "hate", "horrible", "disgusting", "worst",
+        "disappointing", "frustrating", "annoying", "broken", "failed"
+    ),
+    "engagement": (
+        "new", "launch", "announcing", "exclusive", "limited", "free",
+        "join", "discover", "check out", "learn", "get", "win"
+    ),
+}
+
+
+def _build_sentiment_automaton() -> ahocorasick.Automaton:
+    """Build an Aho-Corasick automaton matching every lexicon word at once."""
+    automaton = ahocorasick.Automaton()
+    for category, words in _SENTIMENT_CATEGORIES.items():
+        for word in words:
+            automaton.add_word(word, (category, word))
+    automaton.make_automaton()
+    return automaton
+
+
+_SENTIMENT_AUTOMATON = _build_sentiment_automaton()
+
 
 async def post_tweet(content: str) -> str:
     """Post a tweet to Twitter/X.
@@ -30,7 +57,7 @@ async def post_tweet(content: str) -> str:
     except Exception as e:
         logger.error(f"Failed to post tweet: {e}")
         # Return mock ID for demo
-        return f"demo_tweet_{hash(content) % 1000000}"
+        return f"demo_tweet_{secrets.token_hex(4)}"
 
 
 async def send_slack_notification(channel: str, title: str, message: str) -> bool:
@@ -63,75 +90,17 @@ async def analyze_sentiment(text: str) -> Dict[str, Any]:
         Analysis results including sentiment, engagement score, and keywords
     """
     try:
-        # Simple sentiment analysis - in production would use ML models
-        positive_words = [
-            "excited", "amazing", "great", "awesome", "fantastic", "love", 
-            "excellent", "wonderful", "perfect", "incredible", "outstanding"
-        ]
-        negative_words = [
-            "terrible", "awful", "hate", "horrible", "disgusting", "worst",
-            "disappointing", "frustrating", "annoying", "broken", "failed"
-        ]
-        engagement_words = [
-            "new", "launch", "announcing", "exclusive", "limited", "free",
-            "join", "discover", "check out", "learn", "get", "win"
-        ]
-        
-        text_lower = text.lower()
-        
-        # Count sentiment indicators
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        engagement_count = sum(1 for word in engagement_words if word in text_lower)
-        
-        # Determine sentiment
-        if positive_count > negative_count:
-            sentiment = "positive"
-            sentiment_score = min(0.5 + (positive_count * 0.1), 1.0)
-        elif negative_count > positive_count:
-            sentiment = "negative"
-            sentiment_score = max(0.5 - (negative_count * 0.1), 0.0)
-        else:
-            sentiment = "neutral"
-            sentiment_score = 0.5
-        
-        # Calculate engagement score
-        engagement_score = min(0.3 + (engagement_count * 0.1) + (len(text) / 280 * 0.2), 1.0)
-        
-        # Extract hashtags
-        hashtags = [word for word in text.split() if word.startswith('#')]
+        analysis = _analyze_sentiment_cached(text)
+        sentiment, sentiment_score = analysis["sentiment"], analysis["sentiment_score"]
+        logger.info(f"Sentiment analysis completed: {sentiment} ({sentiment_score})")
         
-        analysis = {
-            "sentiment": sentiment,
-            "sentiment_score": round(sentiment_score, 2),
-            "engagement_score": round(engagement_score, 2),
-            "positive_indicators": positive_count,
-            "negative_indicators": negative_count,
-            "engagement_indicators": engagement_count,
-            "hashtags": hashtags,
-            "character_count": len(text),
-            "word_count": len(text.split()),
-            "recommendations": []
+        # Copy the lists so callers can't mutate the cached result
+        return {
+            **analysis,
+            "hashtags": list(analysis["hashtags"]),
+            "recommendations": list(analysis["recommendations"])
         }
         
-        # Add recommendations
-        if sentiment_score < 0.6:
-            analysis["recommendations"].append("Consider adding more positive language")
-        
-        if engagement_score < 0.5:
-            analysis["recommendations"].append("Add call-to-action or engagement triggers")
-        
-        if len(hashtags) == 0:
-            analysis["recommendations"].append("Add relevant hashtags to increase reach")
-        elif len(hashtags) > 5:
-            analysis["recommendations"].append("Reduce hashtag count to avoid spam appearance")
-        
-        if len(text) < 100:
-            analysis["recommendations"].append("Consider expanding content for better engagement")
-        
-        logger.info(f"Sentiment analysis completed: {sentiment} ({sentiment_score})")
-        return analysis
-        
     except Exception as e:
         logger.error(f"Sentiment analysis failed: {e}")
         return {
@@ -142,6 +111,68 @@ async def analyze_sentiment(text: str) -> Dict[str, Any]:
         }
 
 
+@lru_cache(maxsize=1024)
+def _analyze_sentiment_cached(text: str) -> Dict[str, Any]:
+    """Compute the sentiment analysis for a text; the result depends only on the text."""
+    text_lower = text.lower()
+    tokens = text.split()
+    
+    # Count distinct sentiment indicators in one pass over the text
+    matched = {category: set() for category in _SENTIMENT_CATEGORIES}
+    for _, (category, word) in _SENTIMENT_AUTOMATON.iter(text_lower):
+        matched[category].add(word)
+    positive_count = len(matched["positive"])
+    negative_count = len(matched["negative"])
+    engagement_count = len(matched["engagement"])
+    
+    # Determine sentiment
+    if positive_count > negative_count:
+        sentiment = "positive"
+        sentiment_score = min(0.5 + (positive_count * 0.1), 1.0)
+    elif negative_count > positive_count:
+        sentiment = "negative"
+        sentiment_score = max(0.5 - (negative_count * 0.1), 0.0)
+    else:
+        sentiment = "neutral"
+        sentiment_score = 0.5
+    
+    # Calculate engagement score
+    engagement_score = min(0.3 + (engagement_count * 0.1) + (len(text) / 280 * 0.2), 1.0)
+    
+    # Extract hashtags
+    hashtags = [word for word in tokens if word.startswith('#')]
+    
+    analysis = {
+        "sentiment": sentiment,
+        "sentiment_score": round(sentiment_score, 2),
+        "engagement_score": round(engagement_score, 2),
+        "positive_indicators": positive_count,
+        "negative_indicators": negative_count,
+        "engagement_indicators": engagement_count,
+        "hashtags": hashtags,
+        "character_count": len(text),
+        "word_count": len(tokens),
+        "recommendations": []
+    }
+    
+    # Add recommendations
+    if sentiment_score < 0.6:
+        analysis["recommendations"].append("Consider adding more positive language")
+    
+    if engagement_score < 0.5:
+        analysis["recommendations"].append("Add call-to-action or engagement triggers")
+    
+    if len(hashtags) == 0:
+        analysis["recommendations"].append("Add relevant hashtags to increase reach")
+    elif len(hashtags) > 5:
+        analysis["recommendations"].append("Reduce hashtag count to avoid spam appearance")
+    
+    if len(text) < 100:
+        analysis["recommendations"].append("Consider expanding content for better engagement")
+    
+    return analysis
+
+
 async def schedule_post(content: str, schedule_time: str) -> Dict[str, Any]:
     """Schedule a social media post for later publishing.
     
@@ -155,7 +186,7 @@ async def schedule_post(content: str, schedule_time: str) -> Dict[str, Any]:
     try:
         # Mock scheduling functionality
         # In production, this would integrate with a job queue system
-        job_id = f"scheduled_{hash(content + schedule_time) % 1000000}"
+        job_id = f"scheduled_{secrets.token_hex(4)}"
         
         logger.info(f"Post scheduled for {schedule_time} with job ID: {job_id}")
         
@@ -190,7 +221,7 @@ async def get_brand_mentions(brand_name: str, limit: int = 10) -> List[Dict[str,
         
         for i in range(min(limit, 5)):  # Return up to 5 mock mentions
             mentions.append({
-                "id": f"mention_{i}_{hash(brand_name) % 1000}",
+                "id": f"mention_{i}_{secrets.token_hex(4)}",
                 "platform": "Twitter",
                 "author": f"user_{i + 1}",
                 "content": f"Great experience with {brand_name}! Highly recommend their service.",
@@ -1,138 +1,156 @@
 """Marketing agent implementation using LangGraph."""
 
 import logging
-from typing import Dict, Any, TypedDict
+from typing import Annotated, Dict, Any, TypedDict
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage, SystemMessage
-import sys
-import os
-
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from llm.openai_client import llm
-from agents.marketing_agent.actions import post_tweet, send_slack_notification, analyze_sentiment
+from actions.slack import send_notification_nowait
+from agents.marketing_agent.actions import post_tweet, analyze_sentiment
 
 logger = logging.getLogger(__name__)
 
+# System message for tweet generation, shared by every request
+_GENERATE_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are a professional social media manager. Create engaging tweets "
+    "that are concise, on-brand, and likely to drive engagement. "
+    "Keep tweets under 280 characters and include relevant hashtags. "
+    "Use a friendly but professional tone."
+))
+
+# Tweet generation request, formatted with the content title and body
+_GENERATE_USER_PROMPT = """\
+Create a tweet based on this content:
+Title: {title}
+Body: {body}
+
+Make it engaging and include 2-3 relevant hashtags.
+"""
+
+# Completion budget for a tweet: 280 characters is roughly 70 tokens, plus headroom for
+# hashtags and emoji, so the model stops instead of writing text that gets truncated
+TWEET_MAX_TOKENS = 100
+
+
+def _keep_first_error(current: str, update: str) -> str:
+    """Reducer letting parallel branches report errors without conflicting."""
+    return current or update
+
 
 class MarketingState(TypedDict):
-    """State for the marketing agent workflow."""
+    """State for the marketing agent workflow.
+    
+    Nodes return only the keys they set; LangGraph merges them into the state.
+    """
     content: Dict[str, str]
     tweet: str
     tweet_id: str
     slack_message: str
     sentiment_analysis: Dict[str, Any]
-    error: str
+    error: Annotated[str, _keep_first_error]
+
+
+async def _generate_tweet(state: MarketingState) -> Dict[str, Any]:
+    """Generate a tweet from the provided content."""
+    try:
+        logger.info("Generating tweet content")
+        
+        content = state["content"]
+        title = content.get("title", "")
+        body = content.get("body", "")
+        
+        messages = [
+            _GENERATE_SYSTEM_MESSAGE,
+            HumanMessage(content=_GENERATE_USER_PROMPT.format(title=title, body=body))
+        ]
+        
+        # Not cached: every tweet is published, and X rejects duplicate status text
+        response = await llm.agenerate(messages, max_tokens=TWEET_MAX_TOKENS)
+        tweet = response[0].content.strip()
+        
+        # Ensure tweet is under 280 characters
+        if len(tweet) > 280:
+            tweet = tweet[:277] + "..."
+        
+        logger.info(f"Generated tweet: {tweet[:50]}...")
+        return {"tweet": tweet}
+        
+    except Exception as e:
+        logger.error(f"Failed to generate tweet: {e}")
+        return {"error": str(e)}
+
+
+async def _publish_content(state: MarketingState) -> Dict[str, Any]:
+    """Publish the tweet and send notifications."""
+    try:
+        logger.info("Publishing content to social media")
+        
+        tweet = state["tweet"]
+        if not tweet:
+            return {"error": "No tweet content to publish"}
+        
+        # Post tweet
+        tweet_id = await post_tweet(tweet)
+        
+        # Notify Slack in the background; the response doesn't depend on it
+        slack_message = f"✅ Tweet published successfully!\n\nContent: {tweet}\nTweet ID: {tweet_id}"
+        send_notification_nowait("#marketing", "Tweet Published", slack_message)
+        
+        logger.info(f"Content published. Tweet ID: {tweet_id}")
+        return {"tweet_id": tweet_id, "slack_message": slack_message}
+        
+    except Exception as e:
+        logger.error(f"Failed to publish content: {e}")
+        return {"error": str(e)}
+
+
+async def _analyze_content(state: MarketingState) -> Dict[str, Any]:
+    """Analyze the sentiment and engagement potential of the content."""
+    try:
+        logger.info("Analyzing content sentiment and engagement potential")
+        
+        tweet = state["tweet"]
+        if not tweet:
+            return {"error": "No content to analyze"}
+        
+        # Perform sentiment analysis
+        analysis = await analyze_sentiment(tweet)
+        
+        logger.info(f"Content analysis completed: {analysis.get('sentiment', 'unknown')} sentiment")
+        return {"sentiment_analysis": analysis}
+        
+    except Exception as e:
+        logger.error(f"Failed to analyze content: {e}")
+        return {"error": str(e)}
 
 
 class MarketingAgent:
     """AI agent for marketing automation and social media management."""
     
+    # Compiled workflow shared by all instances; the nodes hold no per-instance state
+    graph = None
+    workflow = None
+    
     def __init__(self):
         """Initialize the marketing agent with StateGraph workflow."""
-        self.graph = StateGraph(MarketingState)
-        self._build_graph()
-        self.workflow = self.graph.compile()
+        if MarketingAgent.workflow is None:
+            MarketingAgent.graph = StateGraph(MarketingState)
+            self._build_graph()
+            MarketingAgent.workflow = MarketingAgent.graph.compile()
     
     def _build_graph(self):
         """Build the StateGraph workflow."""
-        
-        async def generate_tweet(state: MarketingState) -> MarketingState:
-            """Generate a tweet from the provided content."""
-            try:
-                logger.info("Generating tweet content")
-                
-                content = state["content"]
-                title = content.get("title", "")
-                body = content.get("body", "")
-                
-                system_prompt = (
-                    "You are a professional social media manager. Create engaging tweets "
-                    "that are concise, on-brand, and likely to drive engagement. "
-                    "Keep tweets under 280 characters and include relevant hashtags. "
-                    "Use a friendly but professional tone."
-                )
-                
-                user_prompt = f"""
-                Create a tweet based on this content:
-                Title: {title}
-                Body: {body}
-                
-                Make it engaging and include 2-3 relevant hashtags.
-                """
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                response = await llm.agenerate(messages)
-                tweet = response[0].content.strip()
-                
-                # Ensure tweet is under 280 characters
-                if len(tweet) > 280:
-                    tweet = tweet[:277] + "..."
-                
-                logger.info(f"Generated tweet: {tweet[:50]}...")
-                return {**state, "tweet": tweet}
-                
-            except Exception as e:
-                logger.error(f"Failed to generate tweet: {e}")
-                return {**state, "error": str(e)}
-        
-        async def publish_content(state: MarketingState) -> MarketingState:
-            """Publish the tweet and send notifications."""
-            try:
-                logger.info("Publishing content to social media")
-                
-                tweet = state["tweet"]
-                if not tweet:
-                    return {**state, "error": "No tweet content to publish"}
-                
-                # Post tweet
-                tweet_id = await post_tweet(tweet)
-                
-                # Create Slack notification
-                slack_message = f"✅ Tweet published successfully!\n\nContent: {tweet}\nTweet ID: {tweet_id}"
-                await send_slack_notification("#marketing", "Tweet Published", slack_message)
-                
-                logger.info(f"Content published. Tweet ID: {tweet_id}")
-                return {**state, "tweet_id": tweet_id, "slack_message": slack_message}
-                
-            except Exception as e:
-                logger.error(f"Failed to publish content: {e}")
-                return {**state, "error": str(e)}
-        
-        async def analyze_content(state: MarketingState) -> MarketingState:
-            """Analyze the sentiment and engagement potential of the content."""
-            try:
-                logger.info("Analyzing content sentiment and engagement potential")
-                
-                tweet = state["tweet"]
-                if not tweet:
-                    return {**state, "error": "No content to analyze"}
-                
-                # Perform sentiment analysis
-                analysis = await analyze_sentiment(tweet)
-                
-                logger.info(f"Content analysis completed: {analysis.get('sentiment', 'unknown')} sentiment")
-                return {**state, "sentiment_analysis": analysis}
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze content: {e}")
-                return {**state, "error": str(e)}
-        
         # Add nodes to the graph
-        self.graph.add_node("generate", generate_tweet)
-        self.graph.add_node("analyze", analyze_content)
-        self.graph.add_node("publish", publish_content)
+        self.graph.add_node("generate", _generate_tweet)
+        self.graph.add_node("analyze", _analyze_content)
+        self.graph.add_node("publish", _publish_content)
         
-        # Add edges
+        # Add edges; analyze and publish both only need the tweet, so fan out
         self.graph.add_edge(START, "generate")
         self.graph.add_edge("generate", "analyze")
-        self.graph.add_edge("analyze", "publish")
-        self.graph.add_edge("publish", END)
+        self.graph.add_edge("generate", "publish")
+        self.graph.add_edge(["analyze", "publish"], END)
     
     async def process(self, title: str, body: str) -> Dict[str, Any]:
         """Process marketing content and publish to social media.
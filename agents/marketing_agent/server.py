@@ -1,26 +1,41 @@
 """HTTP server for the marketing agent."""
 
 import logging
-import sys
 import os
+from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
+from actions.slack import flush_notifications, slack_client
+from actions.twitter import twitter_client
 from agents.marketing_agent.agent import MarketingAgent
+from llm.openai_client import llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(title="Marketing Agent", description="AI-powered social media and marketing automation")
 
-# Initialize agent
-marketing_agent = MarketingAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the agent once per worker; on shutdown drain notifications and close connections."""
+    app.state.agent = MarketingAgent()
+    yield
+    await flush_notifications()
+    await twitter_client.aclose()
+    await slack_client.aclose()
+    await llm.aclose()
+
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Marketing Agent",
+    description="AI-powered social media and marketing automation",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 
 class MarketingRequest(BaseModel):
@@ -40,12 +55,12 @@ class MarketingResponse(BaseModel):
 
 
 @app.post("/generate", response_model=MarketingResponse)
-async def generate_content(request: MarketingRequest):
+async def generate_content(request: MarketingRequest, http_request: Request):
     """Generate and publish marketing content."""
     try:
         logger.info(f"Processing marketing request: {request.title}")
         
-        result = await marketing_agent.process(
+        result = await http_request.app.state.agent.process(
             title=request.title,
             body=request.body
         )
@@ -74,4 +89,11 @@ async def root():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8082)
\ No newline at end of file
+    uvicorn.run(
+        "agents.marketing_agent.server:app",
+        host="0.0.0.0",
+        port=8082,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
\ No newline at end of file
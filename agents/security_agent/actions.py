@@ -1,17 +1,105 @@
 """Action functions for the security agent."""
 
+import asyncio
 import logging
-import sys
-import os
-from typing import Dict, Any, List
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Sequence
 
-# Add parent directories to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from actions.slack import send_notification
+from actions.slack import send_notification_nowait
 
 logger = logging.getLogger(__name__)
 
+# OWASP Top 10 compliance keys and the vulnerability category each one counts
+_OWASP_CATEGORIES = {
+    "injection": "injection",
+    "authentication": "authentication",
+    "data_exposure": "information_disclosure",
+    "xxe": "xxe",
+    "access_control": "access_control",
+    "security_config": "configuration",
+    "xss": "xss",
+    "deserialization": "deserialization",
+    "components": "components",
+    "logging": "logging"
+}
+
+# Mock findings; in production these would come from security tools
+_COMMON_VULNS = (
+    {
+        "id": "VULN-001",
+        "title": "SQL Injection",
+        "description": "Input validation bypass allowing SQL injection attacks",
+        "severity": "high",
+        "cvss_score": 8.1,
+        "category": "injection",
+        "location": "/api/users",
+        "recommendation": "Implement parameterized queries and input validation"
+    },
+    {
+        "id": "VULN-002", 
+        "title": "Cross-Site Scripting (XSS)",
+        "description": "Stored XSS vulnerability in user comments",
+        "severity": "medium",
+        "cvss_score": 6.1,
+        "category": "xss",
+        "location": "/comments/view",
+        "recommendation": "Sanitize user input and implement CSP headers"
+    },
+    {
+        "id": "VULN-003",
+        "title": "Insecure Direct Object Reference",
+        "description": "Missing authorization checks on sensitive endpoints",
+        "severity": "high",
+        "cvss_score": 7.5,
+        "category": "access_control",
+        "location": "/admin/users",
+        "recommendation": "Implement proper authorization checks"
+    },
+    {
+        "id": "VULN-004",
+        "title": "Sensitive Data Exposure",
+        "description": "Debug information exposed in production",
+        "severity": "medium",
+        "cvss_score": 5.3,
+        "category": "information_disclosure",
+        "location": "/debug/info",
+        "recommendation": "Disable debug mode in production"
+    },
+    {
+        "id": "VULN-005",
+        "title": "Security Misconfiguration",
+        "description": "Default credentials still in use",
+        "severity": "critical",
+        "cvss_score": 9.8,
+        "category": "configuration",
+        "location": "Database connection",
+        "recommendation": "Change default passwords immediately"
+    }
+)
+
+# Findings reported by each scan type
+_SCAN_FINDINGS = {
+    "comprehensive": _COMMON_VULNS,
+    "web": tuple(v for v in _COMMON_VULNS if v["category"] in ("injection", "xss")),
+    "infrastructure": tuple(
+        v for v in _COMMON_VULNS if v["category"] in ("configuration", "access_control")
+    )
+}
+_LIMITED_SCAN_FINDINGS = _COMMON_VULNS[:3]
+
+# Last formatted report date as (timestamp, "YYYY-MM-DD"), reused for a second
+_report_date_cache = (0.0, "")
+
+
+def _report_date() -> str:
+    """Return today's UTC date for report headers, formatting it at most once a second."""
+    global _report_date_cache
+    now = time.time()
+    if now - _report_date_cache[0] >= 1.0:
+        _report_date_cache = (now, time.strftime("%Y-%m-%d", time.gmtime(now)))
+    return _report_date_cache[1]
+
 
 async def scan_vulnerabilities(target: str, scan_type: str) -> List[Dict[str, Any]]:
     """Scan target for security vulnerabilities.
@@ -26,72 +114,9 @@ async def scan_vulnerabilities(target: str, scan_type: str) -> List[Dict[str, An
     try:
         logger.info(f"Scanning {target} for vulnerabilities")
         
-        # Mock vulnerability scanning - in production would integrate with security tools
-        vulnerabilities = []
-        
-        # Common vulnerability categories
-        common_vulns = [
-            {
-                "id": "VULN-001",
-                "title": "SQL Injection",
-                "description": "Input validation bypass allowing SQL injection attacks",
-                "severity": "high",
-                "cvss_score": 8.1,
-                "category": "injection",
-                "location": "/api/users",
-                "recommendation": "Implement parameterized queries and input validation"
-            },
-            {
-                "id": "VULN-002", 
-                "title": "Cross-Site Scripting (XSS)",
-                "description": "Stored XSS vulnerability in user comments",
-                "severity": "medium",
-                "cvss_score": 6.1,
-                "category": "xss",
-                "location": "/comments/view",
-                "recommendation": "Sanitize user input and implement CSP headers"
-            },
-            {
-                "id": "VULN-003",
-                "title": "Insecure Direct Object Reference",
-                "description": "Missing authorization checks on sensitive endpoints",
-                "severity": "high",
-                "cvss_score": 7.5,
-                "category": "access_control",
-                "location": "/admin/users",
-                "recommendation": "Implement proper authorization checks"
-            },
-            {
-                "id": "VULN-004",
-                "title": "Sensitive Data Exposure",
-                "description": "Debug information exposed in production",
-                "severity": "medium",
-                "cvss_score": 5.3,
-                "category": "information_disclosure",
-                "location": "/debug/info",
-                "recommendation": "Disable debug mode in production"
-            },
-            {
-                "id": "VULN-005",
-                "title": "Security Misconfiguration",
-                "description": "Default credentials still in use",
-                "severity": "critical",
-                "cvss_score": 9.8,
-                "category": "configuration",
-                "location": "Database connection",
-                "recommendation": "Change default passwords immediately"
-            }
-        ]
-        
-        # Select vulnerabilities based on scan type and target
-        if scan_type == "comprehensive":
-            vulnerabilities = common_vulns
-        elif scan_type == "web":
-            vulnerabilities = [v for v in common_vulns if v["category"] in ["injection", "xss"]]
-        elif scan_type == "infrastructure":
-            vulnerabilities = [v for v in common_vulns if v["category"] in ["configuration", "access_control"]]
-        else:
-            vulnerabilities = common_vulns[:3]  # Limited scan
+        # Copy the findings; callers annotate them in place
+        findings = _SCAN_FINDINGS.get(scan_type, _LIMITED_SCAN_FINDINGS)
+        vulnerabilities = [dict(v) for v in findings]
         
         logger.info(f"Found {len(vulnerabilities)} vulnerabilities")
         return vulnerabilities
@@ -101,6 +126,32 @@ async def scan_vulnerabilities(target: str, scan_type: str) -> List[Dict[str, An
         return []
 
 
+async def full_assessment(
+    target: str,
+    scan_types: Sequence[str] = ("web", "infrastructure")
+) -> Dict[str, Any]:
+    """Run several scans concurrently and check compliance on the combined findings.
+    
+    Args:
+        target: Target system/URL/repository
+        scan_types: Scan types to run in parallel
+        
+    Returns:
+        Deduplicated vulnerabilities and their compliance status
+    """
+    results = await asyncio.gather(*(scan_vulnerabilities(target, t) for t in scan_types))
+    
+    # Scans can overlap; keep the first report of each finding
+    findings = {}
+    for vulnerabilities in results:
+        for vuln in vulnerabilities:
+            findings.setdefault(vuln.get("id"), vuln)
+    vulnerabilities = list(findings.values())
+    
+    compliance_status = await check_compliance(target, vulnerabilities)
+    return {"vulnerabilities": vulnerabilities, "compliance_status": compliance_status}
+
+
 async def check_compliance(target: str, vulnerabilities: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Check compliance against security standards.
     
@@ -116,23 +167,20 @@ async def check_compliance(target: str, vulnerabilities: List[Dict[str, Any]]) -
         
         # Calculate compliance scores based on vulnerabilities
         total_vulns = len(vulnerabilities)
-        critical_vulns = len([v for v in vulnerabilities if v.get("severity") == "critical"])
-        high_vulns = len([v for v in vulnerabilities if v.get("severity") == "high"])
-        medium_vulns = len([v for v in vulnerabilities if v.get("severity") == "medium"])
-        low_vulns = len([v for v in vulnerabilities if v.get("severity") == "low"])
+        by_severity = defaultdict(list)
+        category_counts = Counter()
+        for v in vulnerabilities:
+            by_severity[v.get("severity")].append(v)
+            category_counts[v.get("category")] += 1
+        
+        critical_vulns = len(by_severity["critical"])
+        high_vulns = len(by_severity["high"])
+        medium_vulns = len(by_severity["medium"])
+        low_vulns = len(by_severity["low"])
         
         # OWASP Top 10 compliance
         owasp_categories = {
-            "injection": len([v for v in vulnerabilities if v.get("category") == "injection"]),
-            "authentication": len([v for v in vulnerabilities if v.get("category") == "authentication"]),
-            "data_exposure": len([v for v in vulnerabilities if v.get("category") == "information_disclosure"]),
-            "xxe": len([v for v in vulnerabilities if v.get("category") == "xxe"]),
-            "access_control": len([v for v in vulnerabilities if v.get("category") == "access_control"]),
-            "security_config": len([v for v in vulnerabilities if v.get("category") == "configuration"]),
-            "xss": len([v for v in vulnerabilities if v.get("category") == "xss"]),
-            "deserialization": len([v for v in vulnerabilities if v.get("category") == "deserialization"]),
-            "components": len([v for v in vulnerabilities if v.get("category") == "components"]),
-            "logging": len([v for v in vulnerabilities if v.get("category") == "logging"])
+            key: category_counts[category] for key, category in _OWASP_CATEGORIES.items()
         }
         
         # Calculate overall compliance score
@@ -174,6 +222,13 @@ async def check_compliance(target: str, vulnerabilities: List[Dict[str, Any]]) -
                 "medium": medium_vulns,
                 "low": low_vulns
             },
+            # The findings themselves, grouped for the report
+            "by_severity": {
+                "critical": by_severity["critical"],
+                "high": by_severity["high"],
+                "medium": by_severity["medium"],
+                "low": by_severity["low"]
+            },
             "frameworks": compliance_frameworks,
             "recommendations": []
         }
@@ -220,11 +275,12 @@ async def generate_security_report(
     try:
         logger.info("Generating security report")
         
-        report = f"""
+        parts = []
+        parts.append(f"""
 # Security Assessment Report
 
 **Target:** {target}  
-**Date:** 2024-01-01  
+**Date:** {_report_date()}  
 **Assessment Type:** Comprehensive Security Scan  
 
 ## Executive Summary
@@ -240,11 +296,11 @@ async def generate_security_report(
 
 ## Vulnerability Details
 
-"""
+""")
         
         # Add vulnerability details
         for i, vuln in enumerate(vulnerabilities[:10], 1):  # Limit to top 10
-            report += f"""
+            parts.append(f"""
 ### {i}. {vuln.get('title', 'Unknown Vulnerability')}
 
 - **Severity:** {vuln.get('severity', 'Unknown').title()}
@@ -253,43 +309,49 @@ async def generate_security_report(
 - **Description:** {vuln.get('description', 'No description available')}
 - **Recommendation:** {vuln.get('recommendation', 'No specific recommendation')}
 
-"""
+""")
         
         # Add compliance section
-        report += f"""
+        parts.append(f"""
 ## Compliance Assessment
 
 ### Overall Score: {compliance_status.get('overall_score', 0)}%
 
 ### Framework Scores:
-"""
+""")
         
         frameworks = compliance_status.get('frameworks', {})
         for framework, data in frameworks.items():
             score = data.get('score', 0)
             status = "✅ Compliant" if score >= 80 else "⚠️ Needs Attention" if score >= 60 else "❌ Non-Compliant"
-            report += f"- **{framework.upper()}:** {score}% {status}\n"
+            parts.append(f"- **{framework.upper()}:** {score}% {status}\n")
+        
+        # check_compliance already grouped the findings; regroup only if it failed
+        by_severity = compliance_status.get("by_severity")
+        if by_severity is None:
+            by_severity = {
+                severity: [v for v in vulnerabilities if v.get('severity') == severity]
+                for severity in ("critical", "high")
+            }
         
         # Add recommendations
-        report += """
+        parts.append("""
 ## Recommendations
 
 ### Immediate Actions (0-24 hours)
-"""
+""")
         
-        critical_vulns = [v for v in vulnerabilities if v.get('severity') == 'critical']
-        for vuln in critical_vulns:
-            report += f"- Address {vuln.get('title', 'critical vulnerability')}: {vuln.get('recommendation', 'No specific guidance')}\n"
+        for vuln in by_severity["critical"]:
+            parts.append(f"- Address {vuln.get('title', 'critical vulnerability')}: {vuln.get('recommendation', 'No specific guidance')}\n")
         
-        report += """
+        parts.append("""
 ### Short-term Actions (1-30 days)
-"""
+""")
         
-        high_vulns = [v for v in vulnerabilities if v.get('severity') == 'high']
-        for vuln in high_vulns:
-            report += f"- Resolve {vuln.get('title', 'high-priority vulnerability')}\n"
+        for vuln in by_severity["high"]:
+            parts.append(f"- Resolve {vuln.get('title', 'high-priority vulnerability')}\n")
         
-        report += """
+        parts.append("""
 ### Long-term Actions (30+ days)
 - Implement continuous security monitoring
 - Establish regular penetration testing schedule
@@ -305,10 +367,12 @@ the overall security posture and compliance standing.
 
 Regular security assessments and continuous monitoring are recommended to maintain and 
 improve security over time.
-"""
+""")
+        
+        report = "".join(parts)
         
-        # Send report notification
-        await send_notification(
+        # Notify Slack in the background; the report doesn't depend on it
+        send_notification_nowait(
             "#security",
             "Security Assessment Complete",
             f"Security assessment completed for {target}\n"
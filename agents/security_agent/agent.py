@@ -1,23 +1,57 @@
 """Security agent implementation using LangGraph."""
 
+import asyncio
 import logging
+from collections import Counter
 from typing import Dict, Any, List, TypedDict
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage, SystemMessage
-import sys
-import os
-
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from llm.openai_client import llm
 from agents.security_agent.actions import scan_vulnerabilities, check_compliance, generate_security_report
 
 logger = logging.getLogger(__name__)
 
+# System messages for the two LLM calls, shared by every request
+_SCAN_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are a cybersecurity expert analyzing potential security vulnerabilities. "
+    "Identify common security issues and provide specific remediation guidance."
+))
+_SUMMARY_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are a security analyst writing an executive summary for a security assessment. "
+    "Create a concise, business-focused summary that highlights key risks and recommendations."
+))
+
+# Security review request, formatted with the target and scan type
+_SCAN_USER_PROMPT = """\
+Analyze the security posture for: {target}
+Scan type: {scan_type}
+
+Focus on:
+1. Common vulnerabilities (OWASP Top 10)
+2. Configuration issues
+3. Access control problems
+4. Data protection concerns
+
+Provide specific findings and remediation steps.
+"""
+
+# Executive summary request, formatted with the headline findings
+_SUMMARY_USER_PROMPT = """\
+Create an executive summary for these security findings:
+Target: {target}
+Vulnerabilities found: {vulnerability_count}
+Compliance score: {compliance_score}%
+
+Top vulnerabilities: {top_vulnerabilities}
+"""
+
 
 class SecurityState(TypedDict):
-    """State for the security agent workflow."""
+    """State for the security agent workflow.
+    
+    Nodes return only the keys they set; LangGraph merges them into the state.
+    """
     target: str
     scan_type: str
     vulnerabilities: List[Dict[str, Any]]
@@ -28,164 +62,150 @@ class SecurityState(TypedDict):
     error: str
 
 
+async def _perform_security_scan(state: SecurityState) -> Dict[str, Any]:
+    """Perform security vulnerability scanning."""
+    try:
+        logger.info(f"Starting security scan for: {state['target']}")
+        
+        target = state["target"]
+        scan_type = state["scan_type"]
+        
+        # Use LLM to analyze security context
+        messages = [
+            _SCAN_SYSTEM_MESSAGE,
+            HumanMessage(content=_SCAN_USER_PROMPT.format(target=target, scan_type=scan_type))
+        ]
+        
+        # The LLM review and the scan are independent, so run them together.
+        # The review is deterministic, so rescans of the same target reuse the cached one
+        response, vulnerabilities = await asyncio.gather(
+            llm.agenerate(messages, use_cache=True, temperature=0),
+            scan_vulnerabilities(target, scan_type)
+        )
+        llm_analysis = response[0].content
+        
+        # Add LLM insights to vulnerabilities
+        llm_insight = llm_analysis[:200] + "..."
+        for vuln in vulnerabilities:
+            vuln["llm_analysis"] = llm_insight
+        
+        logger.info(f"Found {len(vulnerabilities)} potential vulnerabilities")
+        return {"vulnerabilities": vulnerabilities}
+        
+    except Exception as e:
+        logger.error(f"Security scan failed: {e}")
+        return {"error": str(e)}
+
+
+async def _check_compliance_standards(state: SecurityState) -> Dict[str, Any]:
+    """Check compliance against security standards."""
+    try:
+        logger.info("Checking compliance standards")
+        
+        target = state["target"]
+        vulnerabilities = state["vulnerabilities"]
+        
+        # Check compliance status
+        compliance_status = await check_compliance(target, vulnerabilities)
+        
+        logger.info(f"Compliance check completed: {compliance_status.get('overall_score', 0)}% compliant")
+        return {"compliance_status": compliance_status}
+        
+    except Exception as e:
+        logger.error(f"Compliance check failed: {e}")
+        return {"error": str(e)}
+
+
+async def _generate_report(state: SecurityState) -> Dict[str, Any]:
+    """Generate comprehensive security report."""
+    try:
+        logger.info("Generating security report")
+        
+        vulnerabilities = state["vulnerabilities"]
+        compliance_status = state["compliance_status"]
+        
+        # Use LLM to generate executive summary
+        user_prompt = _SUMMARY_USER_PROMPT.format(
+            target=state["target"],
+            vulnerability_count=len(vulnerabilities),
+            compliance_score=compliance_status.get("overall_score", 0),
+            top_vulnerabilities=", ".join(v.get("title", "Unknown") for v in vulnerabilities[:3])
+        )
+        messages = [_SUMMARY_SYSTEM_MESSAGE, HumanMessage(content=user_prompt)]
+        
+        # The summary is deterministic, so identical findings get the cached one
+        response = await llm.agenerate(messages, use_cache=True, temperature=0)
+        executive_summary = response[0].content
+        
+        # Generate detailed report
+        security_report = await generate_security_report(
+            target=state["target"],
+            vulnerabilities=vulnerabilities,
+            compliance_status=compliance_status,
+            executive_summary=executive_summary
+        )
+        
+        # Calculate risk score
+        # check_compliance already counted severities; recount only if it failed
+        severity_counts = compliance_status.get("severity_breakdown")
+        if severity_counts is None:
+            severity_counts = Counter(v.get("severity") for v in vulnerabilities)
+        high_risk_count = severity_counts.get("high", 0)
+        medium_risk_count = severity_counts.get("medium", 0)
+        compliance_score = compliance_status.get("overall_score", 100) / 100
+        
+        risk_score = min(
+            (high_risk_count * 0.3 + medium_risk_count * 0.1) * (1 - compliance_score) * 10,
+            10.0
+        )
+        
+        # Generate recommendations
+        recommendations = []
+        if high_risk_count > 0:
+            recommendations.append("Immediately address high-severity vulnerabilities")
+        if compliance_score < 0.8:
+            recommendations.append("Improve compliance posture to meet industry standards")
+        if len(vulnerabilities) > 10:
+            recommendations.append("Implement automated security scanning in CI/CD pipeline")
+        
+        recommendations.extend([
+            "Conduct regular security training for development team",
+            "Implement security monitoring and alerting",
+            "Schedule quarterly security assessments"
+        ])
+        
+        logger.info(f"Security report generated. Risk score: {risk_score}")
+        return {
+            "security_report": security_report,
+            "risk_score": round(risk_score, 2),
+            "recommendations": recommendations
+        }
+        
+    except Exception as e:
+        logger.error(f"Report generation failed: {e}")
+        return {"error": str(e)}
+
+
 class SecurityAgent:
     """AI agent for security analysis and compliance monitoring."""
     
+    # Compiled workflow shared by all instances; the nodes hold no per-instance state
+    graph = None
+    workflow = None
+    
     def __init__(self):
         """Initialize the security agent with StateGraph workflow."""
-        self.graph = StateGraph(SecurityState)
-        self._build_graph()
-        self.workflow = self.graph.compile()
+        if SecurityAgent.workflow is None:
+            SecurityAgent.graph = StateGraph(SecurityState)
+            self._build_graph()
+            SecurityAgent.workflow = SecurityAgent.graph.compile()
     
     def _build_graph(self):
         """Build the StateGraph workflow."""
-        
-        async def perform_security_scan(state: SecurityState) -> SecurityState:
-            """Perform security vulnerability scanning."""
-            try:
-                logger.info(f"Starting security scan for: {state['target']}")
-                
-                target = state["target"]
-                scan_type = state["scan_type"]
-                
-                # Use LLM to analyze security context
-                system_prompt = (
-                    "You are a cybersecurity expert analyzing potential security vulnerabilities. "
-                    "Identify common security issues and provide specific remediation guidance."
-                )
-                
-                user_prompt = f"""
-                Analyze the security posture for: {target}
-                Scan type: {scan_type}
-                
-                Focus on:
-                1. Common vulnerabilities (OWASP Top 10)
-                2. Configuration issues
-                3. Access control problems
-                4. Data protection concerns
-                
-                Provide specific findings and remediation steps.
-                """
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                response = await llm.agenerate(messages)
-                llm_analysis = response[0].content
-                
-                # Perform actual vulnerability scan
-                vulnerabilities = await scan_vulnerabilities(target, scan_type)
-                
-                # Add LLM insights to vulnerabilities
-                for vuln in vulnerabilities:
-                    vuln["llm_analysis"] = llm_analysis[:200] + "..."
-                
-                logger.info(f"Found {len(vulnerabilities)} potential vulnerabilities")
-                return {**state, "vulnerabilities": vulnerabilities}
-                
-            except Exception as e:
-                logger.error(f"Security scan failed: {e}")
-                return {**state, "error": str(e)}
-        
-        async def check_compliance_standards(state: SecurityState) -> SecurityState:
-            """Check compliance against security standards."""
-            try:
-                logger.info("Checking compliance standards")
-                
-                target = state["target"]
-                vulnerabilities = state["vulnerabilities"]
-                
-                # Check compliance status
-                compliance_status = await check_compliance(target, vulnerabilities)
-                
-                logger.info(f"Compliance check completed: {compliance_status.get('overall_score', 0)}% compliant")
-                return {**state, "compliance_status": compliance_status}
-                
-            except Exception as e:
-                logger.error(f"Compliance check failed: {e}")
-                return {**state, "error": str(e)}
-        
-        async def generate_report(state: SecurityState) -> SecurityState:
-            """Generate comprehensive security report."""
-            try:
-                logger.info("Generating security report")
-                
-                vulnerabilities = state["vulnerabilities"]
-                compliance_status = state["compliance_status"]
-                
-                # Use LLM to generate executive summary
-                system_prompt = (
-                    "You are a security analyst writing an executive summary for a security assessment. "
-                    "Create a concise, business-focused summary that highlights key risks and recommendations."
-                )
-                
-                findings_summary = f"""
-                Target: {state['target']}
-                Vulnerabilities found: {len(vulnerabilities)}
-                Compliance score: {compliance_status.get('overall_score', 0)}%
-                
-                Top vulnerabilities: {', '.join([v.get('title', 'Unknown') for v in vulnerabilities[:3]])}
-                """
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=f"Create an executive summary for these security findings: {findings_summary}")
-                ]
-                
-                response = await llm.agenerate(messages)
-                executive_summary = response[0].content
-                
-                # Generate detailed report
-                security_report = await generate_security_report(
-                    target=state["target"],
-                    vulnerabilities=vulnerabilities,
-                    compliance_status=compliance_status,
-                    executive_summary=executive_summary
-                )
-                
-                # Calculate risk score
-                high_risk_count = len([v for v in vulnerabilities if v.get("severity") == "high"])
-                medium_risk_count = len([v for v in vulnerabilities if v.get("severity") == "medium"])
-                compliance_score = compliance_status.get("overall_score", 100) / 100
-                
-                risk_score = min(
-                    (high_risk_count * 0.3 + medium_risk_count * 0.1) * (1 - compliance_score) * 10,
-                    10.0
-                )
-                
-                # Generate recommendations
-                recommendations = []
-                if high_risk_count > 0:
-                    recommendations.append("Immediately address high-severity vulnerabilities")
-                if compliance_score < 0.8:
-                    recommendations.append("Improve compliance posture to meet industry standards")
-                if len(vulnerabilities) > 10:
-                    recommendations.append("Implement automated security scanning in CI/CD pipeline")
-                
-                recommendations.extend([
-                    "Conduct regular security training for development team",
-                    "Implement security monitoring and alerting",
-                    "Schedule quarterly security assessments"
-                ])
-                
-                logger.info(f"Security report generated. Risk score: {risk_score}")
-                return {
-                    **state, 
-                    "security_report": security_report,
-                    "risk_score": round(risk_score, 2),
-                    "recommendations": recommendations
-                }
-                
-            except Exception as e:
-                logger.error(f"Report generation failed: {e}")
-                return {**state, "error": str(e)}
-        
         # Add nodes to the graph
-        self.graph.add_node("scan", perform_security_scan)
-        self.graph.add_node("compliance", check_compliance_standards)
-        self.graph.add_node("report", generate_report)
+        self.graph.add_node("scan", _perform_security_scan)
+        self.graph.add_node("compliance", _check_compliance_standards)
+        self.graph.add_node("report", _generate_report)
         
         # Add edges
         self.graph.add_edge(START, "scan")
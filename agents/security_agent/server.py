@@ -1,26 +1,39 @@
 """HTTP server for the security agent."""
 
 import logging
-import sys
 import os
+from contextlib import asynccontextmanager
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
+from actions.slack import flush_notifications, slack_client
 from agents.security_agent.agent import SecurityAgent
+from llm.openai_client import llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(title="Security Agent", description="AI-powered security analysis and compliance monitoring")
 
-# Initialize agent
-security_agent = SecurityAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the agent once per worker; on shutdown drain notifications and close connections."""
+    app.state.agent = SecurityAgent()
+    yield
+    await flush_notifications()
+    await slack_client.aclose()
+    await llm.aclose()
+
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Security Agent",
+    description="AI-powered security analysis and compliance monitoring",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 
 class SecurityRequest(BaseModel):
@@ -43,12 +56,12 @@ class SecurityResponse(BaseModel):
 
 
 @app.post("/analyze", response_model=SecurityResponse)
-async def analyze_security(request: SecurityRequest):
+async def analyze_security(request: SecurityRequest, http_request: Request):
     """Perform security analysis on target system."""
     try:
         logger.info(f"Processing security analysis for: {request.target}")
         
-        result = await security_agent.process(
+        result = await http_request.app.state.agent.process(
             target=request.target,
             scan_type=request.scan_type
         )
@@ -62,8 +75,12 @@ async def analyze_security(request: SecurityRequest):
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "security-agent"}
+    """Health check endpoint, including LLM response cache hit/miss counters."""
+    return {
+        "status": "healthy",
+        "service": "security-agent",
+        "llm_cache": llm.response_cache.stats()
+    }
 
 
 @app.get("/")
@@ -77,4 +94,11 @@ async def root():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8083)
\ No newline at end of file
+    uvicorn.run(
+        "agents.security_agent.server:app",
+        host="0.0.0.0",
+        port=8083,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
\ No newline at end of file
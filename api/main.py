@@ -1,12 +1,17 @@
 """FastAPI gateway for the AI-Powered Business Ecosystem."""
 
+import asyncio
+import hashlib
 import logging
 import os
+from contextlib import asynccontextmanager
 from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 import httpx
 import uvicorn
 
@@ -14,11 +19,25 @@ import uvicorn
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open one pooled HTTP client to the agent services and close it on shutdown."""
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(60.0, connect=5.0)
+    )
+    yield
+    await app.state.http.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI-Powered Business Ecosystem",
     description="Multi-tenant, agent-based platform for automation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -93,20 +112,75 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     }
 
 
+async def _probe_agent(client: httpx.AsyncClient, url: str) -> str:
+    """Return the health of one agent service."""
+    try:
+        response = await client.get(f"{url}/health", timeout=5.0)
+        return "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception:
+        return "unreachable"
+
+
+async def _proxy_to_agent(
+    http_request: Request,
+    url: str,
+    payload: BaseModel,
+    timeout: float
+) -> StreamingResponse:
+    """Forward a request to an agent service and stream its response back.
+    
+    Error statuses are raised as httpx.HTTPStatusError before streaming starts.
+    """
+    client = http_request.app.state.http
+    # pydantic encodes the body straight to JSON bytes, skipping the dict round trip
+    request = client.build_request(
+        "POST",
+        url,
+        content=payload.model_dump_json(),
+        headers={"Content-Type": "application/json"},
+        timeout=timeout
+    )
+    response = await client.send(request, stream=True)
+    if response.is_error:
+        await response.aread()
+        response.raise_for_status()
+    
+    return StreamingResponse(
+        response.aiter_bytes(),
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json"),
+        background=BackgroundTask(response.aclose)
+    )
+
+
+def _agent_error(e: httpx.HTTPStatusError) -> HTTPException:
+    """Map an agent's error response to the gateway's HTTP error.
+    
+    Client errors pass through with the agent's status and error detail; agent
+    failures become 502 Bad Gateway so callers can tell them apart from
+    gateway errors.
+    """
+    status_code = e.response.status_code
+    if status_code < 500:
+        # Unwrap FastAPI's {"detail": ...} body instead of nesting it in a string
+        try:
+            body = e.response.json()
+        except ValueError:
+            detail = e.response.text
+        else:
+            detail = body["detail"] if isinstance(body, dict) and "detail" in body else body
+        return HTTPException(status_code=status_code, detail=detail)
+    return HTTPException(status_code=502, detail=f"Agent service returned HTTP {status_code}")
+
+
 # Health check endpoint
 @app.get("/health")
-async def health_check():
+async def health_check(http_request: Request):
     """Health check endpoint."""
-    agent_status = {}
-    
-    # Check agent service health
-    async with httpx.AsyncClient() as client:
-        for agent_name, url in AGENT_SERVICES.items():
-            try:
-                response = await client.get(f"{url}/health", timeout=5.0)
-                agent_status[agent_name] = "healthy" if response.status_code == 200 else "unhealthy"
-            except Exception:
-                agent_status[agent_name] = "unreachable"
+    # Check agent service health; the probes run concurrently
+    client = http_request.app.state.http
+    statuses = await asyncio.gather(*(_probe_agent(client, url) for url in AGENT_SERVICES.values()))
+    agent_status = dict(zip(AGENT_SERVICES, statuses))
     
     return {
         "status": "healthy",
@@ -134,7 +208,8 @@ async def create_tenant(request: TenantRequest, user_info = Depends(verify_token
     """Create a new tenant."""
     try:
         # Mock tenant creation - integrate with database in production
-        tenant_id = f"tenant_{hash(request.name) % 100000}"
+        # Stable across processes and restarts, unlike the salted builtin hash()
+        tenant_id = f"tenant_{hashlib.blake2b(request.name.encode(), digest_size=5).hexdigest()}"
         
         logger.info(f"Created tenant: {tenant_id} for {request.name}")
         
@@ -153,21 +228,26 @@ async def create_tenant(request: TenantRequest, user_info = Depends(verify_token
 
 # Coding Agent endpoints
 @app.post("/api/coding_agent/consume")
-async def trigger_coding_agent(request: CodingRequest, user_info = Depends(verify_token)):
+async def trigger_coding_agent(
+    request: CodingRequest,
+    http_request: Request,
+    user_info = Depends(verify_token)
+):
     """Trigger the coding agent to process requirements."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AGENT_SERVICES['coding']}/generate",
-                json=request.dict(),
-                timeout=120.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await _proxy_to_agent(
+            http_request,
+            f"{AGENT_SERVICES['coding']}/generate",
+            request,
+            timeout=120.0
+        )
             
     except httpx.RequestError as e:
         logger.error(f"Coding agent request failed: {e}")
         raise HTTPException(status_code=503, detail="Coding agent service unavailable")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Coding agent returned HTTP {e.response.status_code}")
+        raise _agent_error(e)
     except Exception as e:
         logger.error(f"Coding agent error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -175,21 +255,26 @@ async def trigger_coding_agent(request: CodingRequest, user_info = Depends(verif
 
 # Marketing Agent endpoints
 @app.post("/api/marketing_agent/draft")
-async def trigger_marketing_agent(request: MarketingRequest, user_info = Depends(verify_token)):
+async def trigger_marketing_agent(
+    request: MarketingRequest,
+    http_request: Request,
+    user_info = Depends(verify_token)
+):
     """Trigger the marketing agent to create and publish content."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AGENT_SERVICES['marketing']}/generate",
-                json=request.dict(),
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await _proxy_to_agent(
+            http_request,
+            f"{AGENT_SERVICES['marketing']}/generate",
+            request,
+            timeout=60.0
+        )
             
     except httpx.RequestError as e:
         logger.error(f"Marketing agent request failed: {e}")
         raise HTTPException(status_code=503, detail="Marketing agent service unavailable")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Marketing agent returned HTTP {e.response.status_code}")
+        raise _agent_error(e)
     except Exception as e:
         logger.error(f"Marketing agent error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -197,21 +282,26 @@ async def trigger_marketing_agent(request: MarketingRequest, user_info = Depends
 
 # Security Agent endpoints
 @app.post("/api/security_agent/scan")
-async def trigger_security_agent(request: SecurityRequest, user_info = Depends(verify_token)):
+async def trigger_security_agent(
+    request: SecurityRequest,
+    http_request: Request,
+    user_info = Depends(verify_token)
+):
     """Trigger the security agent to perform security analysis."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AGENT_SERVICES['security']}/analyze",
-                json=request.dict(),
-                timeout=180.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await _proxy_to_agent(
+            http_request,
+            f"{AGENT_SERVICES['security']}/analyze",
+            request,
+            timeout=180.0
+        )
             
     except httpx.RequestError as e:
         logger.error(f"Security agent request failed: {e}")
         raise HTTPException(status_code=503, detail="Security agent service unavailable")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Security agent returned HTTP {e.response.status_code}")
+        raise _agent_error(e)
     except Exception as e:
         logger.error(f"Security agent error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -219,21 +309,26 @@ async def trigger_security_agent(request: SecurityRequest, user_info = Depends(v
 
 # Business Development Agent endpoints
 @app.post("/api/bizdev_agent/process_lead")
-async def trigger_bizdev_agent(request: BizDevRequest, user_info = Depends(verify_token)):
+async def trigger_bizdev_agent(
+    request: BizDevRequest,
+    http_request: Request,
+    user_info = Depends(verify_token)
+):
     """Trigger the business development agent to process a lead."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AGENT_SERVICES['bizdev']}/process_lead",
-                json=request.dict(),
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()
+        return await _proxy_to_agent(
+            http_request,
+            f"{AGENT_SERVICES['bizdev']}/process_lead",
+            request,
+            timeout=60.0
+        )
             
     except httpx.RequestError as e:
         logger.error(f"BizDev agent request failed: {e}")
         raise HTTPException(status_code=503, detail="BizDev agent service unavailable")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"BizDev agent returned HTTP {e.response.status_code}")
+        raise _agent_error(e)
     except Exception as e:
         logger.error(f"BizDev agent error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -273,4 +368,11 @@ async def get_system_status():
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
\ No newline at end of file
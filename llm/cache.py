@@ -0,0 +1,52 @@
+"""In-process cache for LLM responses."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LLMCache:
+    """Exact-match LRU cache of LLM responses with per-entry expiry."""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        """Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of cached responses
+            ttl: Default time-to-live of an entry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for a key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a response, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for observability."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
\ No newline at end of file
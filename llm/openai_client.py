@@ -1,50 +1,112 @@
 """Azure OpenAI client wrapper for LLM interactions."""
 
+import asyncio
+import hashlib
 import os
 import logging
-from typing import List, Dict, Any, Optional
+import random
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Type, TypeVar
+import httpx
+import openai
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
 
+from llm.cache import LLMCache
+from llm.retry import parse_retry_after
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Returned in place of a completion when the API call fails
+FALLBACK_MESSAGE = (
+    "I apologize, but I'm experiencing technical difficulties. Please try again later."
+)
+
+# Transient API failures retried with backoff: throttling, connection problems
+# and timeouts, and server-side errors
+RETRIABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError
+)
+# Total attempts per chat call, including the first
+MAX_ATTEMPTS = 5
+
+
+@lru_cache(maxsize=1024)
+def _demo_message(prefix: str) -> AIMessage:
+    """Build the demo-mode reply for a prompt prefix, shared between identical prompts."""
+    return AIMessage(content=f"[DEMO MODE] Response to: {prefix}...")
+
 
 class AzureOpenAIClient:
     """Azure OpenAI LLM client with rate limiting and error handling."""
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_concurrency: int = 16
+    ):
         """Initialize Azure OpenAI client.
         
         Args:
             model: Azure OpenAI deployment name
             temperature: Sampling temperature
+            max_concurrency: Maximum number of chat requests in flight at once
         """
         self.model = model
         self.temperature = temperature
+        self.max_concurrency = max_concurrency
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
         self.api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
         self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", model)
+        # Created in demo mode too, so its stats can always be reported
+        self.response_cache = LLMCache()
         
         if not self.api_key or not self.endpoint:
             logger.warning("Azure OpenAI credentials not set, using demo mode")
             self._demo_mode = True
         else:
             self._demo_mode = False
+            self._structured_clients: Dict[type, Any] = {}
+            self._in_flight: Dict[str, asyncio.Task] = {}
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+            # Keep-alive HTTP/2 pool shared by all async calls in the process
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(30.0, connect=5.0)
+            )
             self.client = AzureChatOpenAI(
                 azure_deployment=self.deployment_name,
                 azure_endpoint=self.endpoint,
                 api_key=self.api_key,
                 api_version=self.api_version,
                 temperature=temperature,
-                max_tokens=1000
+                max_tokens=1000,
+                # Transient failures are retried by _with_retry / generate
+                max_retries=0,
+                http_async_client=self._http_client
             )
     
-    async def agenerate(self, messages: List[BaseMessage], **kwargs) -> List[AIMessage]:
+    async def agenerate(
+        self,
+        messages: List[BaseMessage],
+        use_cache: bool = False,
+        **kwargs
+    ) -> List[AIMessage]:
         """Generate response from messages asynchronously.
         
         Args:
             messages: List of chat messages
+            use_cache: Serve identical repeated requests from the response cache;
+                only honoured at temperature 0, where the output is deterministic
             **kwargs: Additional generation parameters
             
         Returns:
@@ -52,16 +114,166 @@ class AzureOpenAIClient:
         """
         if self._demo_mode:
             # Return mock responses for demo
-            content = f"[DEMO MODE] Response to: {messages[-1].content[:50]}..."
-            return [AIMessage(content=content)]
+            return [_demo_message(messages[-1].content[:50])]
         
         try:
-            response = await self.client.agenerate([messages], **kwargs)
-            return response.generations[0]
+            temperature = kwargs.get("temperature", self.temperature)
+            key = self._request_key(
+                messages, f"generate:{self.deployment_name}:{temperature}", kwargs
+            )
+            # Sampled completions are meant to vary, so they are never replayed
+            use_cache = use_cache and temperature == 0
+            if use_cache:
+                cached = await self.response_cache.get(key)
+                if cached is not None:
+                    return cached
+            
+            response = await self._coalesce(
+                key, lambda: self._with_retry(lambda: self.client.agenerate([messages], **kwargs))
+            )
+            generations = [generation.message for generation in response.generations[0]]
+            
+            # Only successful responses are cached; failures fall through to the fallback
+            if use_cache:
+                await self.response_cache.set(key, generations)
+            return generations
         except Exception as e:
             logger.error(f"Azure OpenAI API error: {e}")
             # Fallback response
-            return [AIMessage(content="I apologize, but I'm experiencing technical difficulties. Please try again later.")]
+            return [AIMessage(content=FALLBACK_MESSAGE)]
+    
+    async def agenerate_batch(
+        self,
+        batch: List[List[BaseMessage]],
+        **kwargs
+    ) -> List[List[AIMessage]]:
+        """Generate responses for several conversations concurrently.
+        
+        Each conversation is still its own API request. The requests are
+        issued together, each takes its own slot under the client's
+        concurrency limit, and a rate-limited conversation is retried alone.
+        
+        Args:
+            batch: One list of chat messages per conversation
+            **kwargs: Additional generation parameters
+            
+        Returns:
+            One list of AI response messages per conversation, in order
+        """
+        if self._demo_mode:
+            return [[_demo_message(messages[-1].content[:50])] for messages in batch]
+        
+        async def generate_one(messages: List[BaseMessage]) -> List[AIMessage]:
+            try:
+                response = await self._with_retry(
+                    lambda: self.client.agenerate([messages], **kwargs)
+                )
+                return [generation.message for generation in response.generations[0]]
+            except Exception as e:
+                logger.error(f"Azure OpenAI API error: {e}")
+                return [AIMessage(content=FALLBACK_MESSAGE)]
+        
+        return list(await asyncio.gather(*(generate_one(messages) for messages in batch)))
+    
+    async def agenerate_structured(
+        self,
+        messages: List[BaseMessage],
+        schema: Type[T],
+        **kwargs
+    ) -> Optional[T]:
+        """Generate a response parsed into a structured schema asynchronously.
+        
+        Args:
+            messages: List of chat messages
+            schema: Pydantic model describing the expected output
+            **kwargs: Additional generation parameters
+            
+        Returns:
+            Parsed schema instance, or None in demo mode or on error
+        """
+        if self._demo_mode:
+            return None
+        
+        try:
+            structured_client = self._structured_clients.get(schema)
+            if structured_client is None:
+                structured_client = self.client.with_structured_output(schema)
+                self._structured_clients[schema] = structured_client
+            key = self._request_key(messages, schema.__qualname__, kwargs)
+            return await self._coalesce(
+                key, lambda: self._with_retry(lambda: structured_client.ainvoke(messages, **kwargs))
+            )
+        except Exception as e:
+            logger.error(f"Azure OpenAI structured output error: {e}")
+            return None
+    
+    @staticmethod
+    def _request_key(messages: List[BaseMessage], kind: str, kwargs: Dict[str, Any]) -> str:
+        """Hash a request so identical concurrent calls can be recognised."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{kind}:{sorted(kwargs.items())!r}".encode())
+        for message in messages:
+            digest.update(f"\x00{message.type}:{message.content}".encode())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying a failed call.
+        
+        Uses the provider's Retry-After when the error carries a response
+        with one, otherwise exponential backoff with jitter.
+        """
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        delay = parse_retry_after(retry_after)
+        return delay if delay is not None else min(2 ** attempt, 30) + random.random()
+    
+    async def _with_retry(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a chat call under the concurrency limit, retrying transient failures.
+        
+        The concurrency slot is released while waiting to retry, so backoff
+        doesn't hold capacity other calls could use. Other errors propagate
+        immediately.
+        
+        Args:
+            call: Zero-argument callable issuing the backend request
+            
+        Returns:
+            The result of the first successful call
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                async with self._semaphore:
+                    return await call()
+            except RETRIABLE_ERRORS as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(f"Azure OpenAI call failed ({e!r}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def _coalesce(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Share one in-flight backend call between concurrent identical requests.
+        
+        Args:
+            key: Request hash from _request_key
+            call: Zero-argument callable issuing the backend request
+            
+        Returns:
+            The result of the shared backend call
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        if not self._demo_mode:
+            await self._http_client.aclose()
     
     def generate(self, messages: List[BaseMessage], **kwargs) -> List[AIMessage]:
         """Generate response from messages synchronously.
@@ -75,16 +287,24 @@ class AzureOpenAIClient:
         """
         if self._demo_mode:
             # Return mock responses for demo
-            content = f"[DEMO MODE] Response to: {messages[-1].content[:50]}..."
-            return [AIMessage(content=content)]
+            return [_demo_message(messages[-1].content[:50])]
         
         try:
-            response = self.client.generate([messages], **kwargs)
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    response = self.client.generate([messages], **kwargs)
+                    break
+                except RETRIABLE_ERRORS as e:
+                    if attempt == MAX_ATTEMPTS - 1:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                    logger.warning(f"Azure OpenAI call failed ({e!r}), retrying in {delay:.2f}s")
+                    time.sleep(delay)
             return response.generations[0]
         except Exception as e:
             logger.error(f"Azure OpenAI API error: {e}")
             # Fallback response
-            return [AIMessage(content="I apologize, but I'm experiencing technical difficulties. Please try again later.")]
+            return [AIMessage(content=FALLBACK_MESSAGE)]
 
 
 # Default instance
@@ -0,0 +1,26 @@
+"""Retry helpers shared by the LLM and external API clients."""
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header into a delay in seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
\ No newline at end of file
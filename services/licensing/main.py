@@ -1,12 +1,19 @@
 """Licensing service main application."""
 
+import hmac
 import logging
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uvicorn
 
 # Configure logging
@@ -17,17 +24,60 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Licensing Service",
     description="Usage tracking and billing for AI agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
+# Only compress bodies large enough to be worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Security
 security = HTTPBearer()
+# Expected service-to-service token
+_SERVICE_TOKEN = b"licensing-service-token"
 
 # Mock database - in production use PostgreSQL
 TENANTS_DB = {}
-USAGE_DB = {}
 LICENSES_DB = {}
 
+# Agent types tracked for usage, in counter column order
+AGENT_TYPES = ("coding", "marketing", "security", "bizdev")
+_AGENT_COLUMNS = {agent_type: column for column, agent_type in enumerate(AGENT_TYPES)}
+
+
+def _new_usage_bucket() -> Dict[str, Any]:
+    """Create the usage counters for a tenant seen for the first time."""
+    return {
+        "requests": [0] * len(AGENT_TYPES),
+        "tokens": [0] * len(AGENT_TYPES),
+        "total_requests": 0,
+        "total_tokens": 0,
+        "overage": False
+    }
+
+
+# Per-tenant usage: request and token counters with one column per agent type,
+# plus running totals and an over-limit flag kept in step with them
+USAGE_DB: Dict[str, Dict[str, Any]] = defaultdict(_new_usage_bucket)
+
+# Request and token limits per plan
+PLAN_LIMITS = MappingProxyType({
+    "basic": MappingProxyType({"requests": 100, "tokens": 10000}),
+    "pro": MappingProxyType({"requests": 1000, "tokens": 100000}),
+    "enterprise": MappingProxyType({"requests": 10000, "tokens": 1000000})
+})
+DEFAULT_LIMITS = PLAN_LIMITS["basic"]
+
+# Basic pricing model: monthly base price per plan and per-unit overage rates
+BASE_PRICES = MappingProxyType({"basic": 29, "pro": 99, "enterprise": 299})
+OVERAGE_RATES = MappingProxyType({"requests": 0.01, "tokens": 0.001})
+
+# License applied to tenants without one on record
+_DEFAULT_LICENSE_VIEW = MappingProxyType({
+    "plan": "basic",
+    "limits": DEFAULT_LIMITS,
+    "active": True
+})
+
 
 # Request/Response Models
 class TenantUsage(BaseModel):
@@ -35,7 +85,7 @@ class TenantUsage(BaseModel):
     agent_type: str
     requests_count: int = 1
     tokens_used: int = 0
-    timestamp: str = datetime.now().isoformat()
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class UsageResponse(BaseModel):
@@ -58,11 +108,44 @@ class LicenseInfo(BaseModel):
 async def verify_service_token(token: str = Depends(security)):
     """Verify service-to-service token."""
     # Mock verification - in production use proper service authentication
-    if not token or token.credentials != "licensing-service-token":
+    if not token or not hmac.compare_digest(token.credentials.encode(), _SERVICE_TOKEN):
         raise HTTPException(status_code=401, detail="Invalid service token")
     return True
 
 
+def _usage_by_agent(bucket: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Expand a tenant's usage counters into a per-agent breakdown."""
+    return {
+        agent_type: {"requests": bucket["requests"][column], "tokens": bucket["tokens"][column]}
+        for column, agent_type in enumerate(AGENT_TYPES)
+    }
+
+
+# Last formatted local timestamp as (whole second, ISO-8601 string), reused within that second
+_iso_now_cache = (0, "")
+
+
+def _iso_now() -> str:
+    """Return the current local time in ISO-8601, formatting it at most once a second."""
+    global _iso_now_cache
+    now = int(time.time())
+    if now != _iso_now_cache[0]:
+        _iso_now_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return _iso_now_cache[1]
+
+
+@lru_cache(maxsize=4096)
+def _license_view(tenant_id: str) -> Tuple[str, int, int]:
+    """Resolve a tenant's plan and limits; cleared whenever a license is written.
+    
+    Returns:
+        Tuple of (plan, request limit, token limit)
+    """
+    license_info = LICENSES_DB.get(tenant_id) or _DEFAULT_LICENSE_VIEW
+    limits = license_info["limits"]
+    return license_info["plan"], limits["requests"], limits["tokens"]
+
+
 @app.post("/api/usage/record", response_model=UsageResponse)
 async def record_usage(usage: TenantUsage, authenticated: bool = Depends(verify_service_token)):
     """Record agent usage for a tenant."""
@@ -70,39 +153,29 @@ async def record_usage(usage: TenantUsage, authenticated: bool = Depends(verify_
         tenant_id = usage.tenant_id
         agent_type = usage.agent_type
         
-        # Initialize tenant usage if not exists
-        if tenant_id not in USAGE_DB:
-            USAGE_DB[tenant_id] = {
-                "coding": {"requests": 0, "tokens": 0},
-                "marketing": {"requests": 0, "tokens": 0},
-                "security": {"requests": 0, "tokens": 0},
-                "bizdev": {"requests": 0, "tokens": 0}
-            }
-        
-        # Record usage
-        USAGE_DB[tenant_id][agent_type]["requests"] += usage.requests_count
-        USAGE_DB[tenant_id][agent_type]["tokens"] += usage.tokens_used
+        # Record usage; the bucket is created on first use
+        column = _AGENT_COLUMNS[agent_type]
+        bucket = USAGE_DB[tenant_id]
+        bucket["requests"][column] += usage.requests_count
+        bucket["tokens"][column] += usage.tokens_used
+        bucket["total_requests"] += usage.requests_count
+        bucket["total_tokens"] += usage.tokens_used
         
         # Get tenant license info
-        license_info = LICENSES_DB.get(tenant_id, {
-            "plan": "basic",
-            "limits": {"requests": 100, "tokens": 10000},
-            "expires_at": (datetime.now() + timedelta(days=30)).isoformat(),
-            "active": True
-        })
+        _, request_limit, token_limit = _license_view(tenant_id)
         
         # Calculate current usage
         current_usage = {
-            "total_requests": sum(data["requests"] for data in USAGE_DB[tenant_id].values()),
-            "total_tokens": sum(data["tokens"] for data in USAGE_DB[tenant_id].values())
+            "total_requests": bucket["total_requests"],
+            "total_tokens": bucket["total_tokens"]
         }
         
         # Check for overages
-        limits = license_info["limits"]
         overage = (
-            current_usage["total_requests"] > limits["requests"] or
-            current_usage["total_tokens"] > limits["tokens"]
+            current_usage["total_requests"] > request_limit or
+            current_usage["total_tokens"] > token_limit
         )
+        bucket["overage"] = overage
         
         logger.info(f"Usage recorded for tenant {tenant_id}: {usage.requests_count} requests, {usage.tokens_used} tokens")
         
@@ -110,7 +183,7 @@ async def record_usage(usage: TenantUsage, authenticated: bool = Depends(verify_
             success=True,
             tenant_id=tenant_id,
             current_usage=current_usage,
-            limits=limits,
+            limits={"requests": request_limit, "tokens": token_limit},
             overage=overage
         )
         
@@ -127,18 +200,18 @@ async def get_usage(tenant_id: str, authenticated: bool = Depends(verify_service
     """Get current usage for a tenant."""
     try:
         if tenant_id not in USAGE_DB:
-            return {"tenant_id": tenant_id, "usage": {}, "total_requests": 0, "total_tokens": 0}
+            return ORJSONResponse(
+                {"tenant_id": tenant_id, "usage": {}, "total_requests": 0, "total_tokens": 0}
+            )
         
-        usage_data = USAGE_DB[tenant_id]
-        total_requests = sum(data["requests"] for data in usage_data.values())
-        total_tokens = sum(data["tokens"] for data in usage_data.values())
+        bucket = USAGE_DB[tenant_id]
         
-        return {
+        return ORJSONResponse({
             "tenant_id": tenant_id,
-            "usage": usage_data,
-            "total_requests": total_requests,
-            "total_tokens": total_tokens
-        }
+            "usage": _usage_by_agent(bucket),
+            "total_requests": bucket["total_requests"],
+            "total_tokens": bucket["total_tokens"]
+        })
         
     except Exception as e:
         logger.error(f"Failed to get usage: {e}")
@@ -151,23 +224,25 @@ async def create_license(license_info: LicenseInfo, authenticated: bool = Depend
     try:
         tenant_id = license_info.tenant_id
         
-        # Define plan limits
-        plan_limits = {
-            "basic": {"requests": 100, "tokens": 10000},
-            "pro": {"requests": 1000, "tokens": 100000},
-            "enterprise": {"requests": 10000, "tokens": 1000000}
-        }
-        
         # Set limits based on plan
-        limits = plan_limits.get(license_info.plan, plan_limits["basic"])
+        limits = PLAN_LIMITS.get(license_info.plan, DEFAULT_LIMITS)
         
         LICENSES_DB[tenant_id] = {
             "plan": license_info.plan,
-            "limits": limits,
+            "limits": dict(limits),
             "expires_at": license_info.expires_at,
             "active": license_info.active,
-            "created_at": datetime.now().isoformat()
+            "created_at": _iso_now()
         }
+        _license_view.cache_clear()
+        
+        # Re-evaluate the over-limit flag against the new limits
+        bucket = USAGE_DB.get(tenant_id)
+        if bucket is not None:
+            bucket["overage"] = (
+                bucket["total_requests"] > limits["requests"] or
+                bucket["total_tokens"] > limits["tokens"]
+            )
         
         logger.info(f"License created for tenant {tenant_id}: {license_info.plan} plan")
         
@@ -191,10 +266,10 @@ async def get_license(tenant_id: str, authenticated: bool = Depends(verify_servi
         if not license_info:
             raise HTTPException(status_code=404, detail="License not found")
         
-        return {
+        return ORJSONResponse({
             "tenant_id": tenant_id,
             "license": license_info
-        }
+        })
         
     except HTTPException:
         raise
@@ -207,50 +282,46 @@ async def get_license(tenant_id: str, authenticated: bool = Depends(verify_servi
 async def get_billing_info(tenant_id: str, authenticated: bool = Depends(verify_service_token)):
     """Get billing information for a tenant."""
     try:
-        usage_data = USAGE_DB.get(tenant_id, {})
-        license_info = LICENSES_DB.get(tenant_id, {})
+        bucket = USAGE_DB.get(tenant_id, {})
+        plan, request_limit, token_limit = _license_view(tenant_id)
         
-        total_requests = sum(data["requests"] for data in usage_data.values()) if usage_data else 0
-        total_tokens = sum(data["tokens"] for data in usage_data.values()) if usage_data else 0
+        total_requests = bucket.get("total_requests", 0)
+        total_tokens = bucket.get("total_tokens", 0)
         
         # Calculate billing based on usage and overages
-        plan = license_info.get("plan", "basic")
-        limits = license_info.get("limits", {"requests": 100, "tokens": 10000})
-        
-        # Basic pricing model
-        base_prices = {"basic": 29, "pro": 99, "enterprise": 299}
-        overage_rates = {"requests": 0.01, "tokens": 0.001}  # Per unit overage
-        
-        base_cost = base_prices.get(plan, 29)
+        base_cost = BASE_PRICES.get(plan, BASE_PRICES["basic"])
         
         # Calculate overages
-        request_overage = max(0, total_requests - limits["requests"])
-        token_overage = max(0, total_tokens - limits["tokens"])
+        if bucket.get("overage"):
+            request_overage = max(0, total_requests - request_limit)
+            token_overage = max(0, total_tokens - token_limit)
+        else:
+            request_overage = token_overage = 0
         
         overage_cost = (
-            request_overage * overage_rates["requests"] +
-            token_overage * overage_rates["tokens"]
+            request_overage * OVERAGE_RATES["requests"] +
+            token_overage * OVERAGE_RATES["tokens"]
         )
         
         total_cost = base_cost + overage_cost
         
-        return {
+        return ORJSONResponse({
             "tenant_id": tenant_id,
-            "billing_period": datetime.now().strftime("%Y-%m"),
+            "billing_period": _iso_now()[:7],
             "plan": plan,
             "base_cost": base_cost,
             "usage": {
                 "requests": total_requests,
                 "tokens": total_tokens
             },
-            "limits": limits,
+            "limits": {"requests": request_limit, "tokens": token_limit},
             "overages": {
                 "requests": request_overage,
                 "tokens": token_overage,
                 "cost": round(overage_cost, 2)
             },
             "total_cost": round(total_cost, 2)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get billing info: {e}")
@@ -275,4 +346,12 @@ async def root():
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8085))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # Single process: the in-memory stores are not shared between workers
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        access_log=False
+    )
\ No newline at end of file